@@ -0,0 +1,83 @@
+'''
+Сравнение пропускной способности синхронных и асинхронных версий REST API под конкурентной нагрузкой.
+
+Запросы проходят через асинхронный обработчик Django (как под uvicorn), синхронные view
+при этом выполняются в отдельном потоке через sync_to_async.
+
+Запуск из директории cafeshop:
+    python -m benchmarks.async_vs_sync --orders 2000 --requests 500 --concurrency 50
+'''
+import time
+import asyncio
+import argparse
+
+from .utils import setup_django, benchmark_database, percentile
+
+
+SCENARIOS = [
+    # (название, синхронный маршрут, асинхронный маршрут, параметры)
+    ('list page', 'orders:order-api-list', 'orders:order-async-api-list', {'limit': 50}),
+    ('search', 'orders:order-api-list', 'orders:order-async-api-list', {'q': '7', 'limit': 50}),
+    ('revenue', 'orders:order-api-revenue', 'orders:order-async-api-revenue', {'from': '2000-01-01'}),
+]
+
+
+async def run_load(url: str, params: dict, requests: int, concurrency: int) -> dict:
+    '''Функция отправки requests запросов с concurrency одновременными клиентами'''
+    from asgiref.sync import sync_to_async
+    from django.db import connections
+    from django.test import AsyncClient
+
+    client = AsyncClient()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one_request():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            resp = await client.get(url, params)
+            latencies.append(time.perf_counter() - started)
+            if resp.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    # соединения открываются в потоке sync_to_async и должны закрываться там же
+    await sync_to_async(connections.close_all)()
+    return {
+        'rps': requests / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк sync vs async REST API')
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50])
+    args = parser.parse_args()
+
+    setup_django()
+    from django.urls import reverse
+    from .seed import seed
+
+    with benchmark_database():
+        seed(orders=args.orders)
+        print(f'{"scenario":<12} {"mode":<6} {"conc":>5} {"req/s":>9} {"p50 ms":>9} {"p99 ms":>9} {"errors":>7}')
+        for name, sync_name, async_name, params in SCENARIOS:
+            for concurrency in args.concurrency:
+                for mode, url_name in (('sync', sync_name), ('async', async_name)):
+                    result = asyncio.run(run_load(reverse(url_name), params, args.requests, concurrency))
+                    print(
+                        f'{name:<12} {mode:<6} {concurrency:>5} {result["rps"]:>9.1f} '
+                        f'{result["p50_ms"]:>9.1f} {result["p99_ms"]:>9.1f} {result["errors"]:>7}'
+                    )
+
+
+if __name__ == '__main__':
+    main()
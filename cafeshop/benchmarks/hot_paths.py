@@ -0,0 +1,140 @@
+'''
+Микробенчмарки горячих путей заказов: функции из orders.funcs и эндпоинты REST API
+на нескольких объёмах данных. Для каждого замера выводятся время, число запросов к БД
+и пиковая память Python, результаты сохраняются в JSON для сравнения прогонов.
+
+Запуск из директории cafeshop:
+    python -m benchmarks.hot_paths --sizes 1000 10000 100000 --output results.json
+    python -m benchmarks.hot_paths --sizes 1000 --baseline results.json
+'''
+import gc
+import json
+import time
+import random
+import argparse
+import statistics
+import tracemalloc
+from datetime import datetime
+
+from .utils import setup_django, benchmark_database
+
+
+def measure(func, repeat: int) -> dict:
+    '''Функция замера func: медиана и минимум времени, запросы к БД и пиковая память'''
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    func()  # прогрев кэшей каталога и соединения
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    # память и запросы считаются отдельным прогоном, чтобы не искажать время
+    with CaptureQueriesContext(connection) as queries:
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        'median_ms': statistics.median(timings) * 1000,
+        'min_ms': min(timings) * 1000,
+        'queries': len(queries),
+        'peak_kb': peak / 1024,
+    }
+
+
+def get_cases(items: list, rng: random.Random) -> dict:
+    '''Функция получения замеряемых функций и эндпоинтов по имени'''
+    from django.db import transaction
+    from django.test import Client, RequestFactory
+    from django.urls import reverse
+
+    from orders.api_views import create_order_api
+    from orders.funcs import get_api_queryset, get_orders_json, find_items_in_order
+
+    client = Client()
+    factory = RequestFactory()
+    order_items = [{'id': item.id, 'count': rng.randint(1, 4)} for item in rng.sample(items, 5)]
+    body = json.dumps({'table_number': 7, 'items': order_items})
+
+    def create_order():
+        # заказ не сохраняется, чтобы объём данных между замерами не менялся
+        with transaction.atomic():
+            create_order_api(factory.post('/', data=body, content_type='application/json'))
+            transaction.set_rollback(True)
+
+    def get(url_name: str, params: dict | None = None):
+        url = reverse(url_name)
+        return lambda: client.get(url, params or {})
+
+    return {
+        'get_api_queryset': lambda: list(get_api_queryset()),
+        'get_orders_json': lambda: get_orders_json(get_api_queryset()),
+        'find_items_in_order': lambda: find_items_in_order(order_items),
+        'create_order_api': create_order,
+        'GET orders': get('orders:order-api-list'),
+        'GET orders page': get('orders:order-api-list', {'limit': 50}),
+        'GET orders search': get('orders:order-api-list', {'q': '7', 'limit': 50}),
+        'GET revenue': get('orders:order-api-revenue', {'from': '2000-01-01'}),
+        'POST orders': lambda: client.post(
+            reverse('orders:order-api-list'), data=body, content_type='application/json'
+        ),
+    }
+
+
+def print_results(results: list[dict], baseline: list[dict] | None = None):
+    previous = {(row['orders'], row['case']): row for row in baseline or []}
+    print(f'{"orders":>8} {"case":<20} {"median ms":>10} {"min ms":>9} {"queries":>8} {"peak KB":>9} {"vs base":>8}')
+    for row in results:
+        base = previous.get((row['orders'], row['case']))
+        ratio = f'{row["median_ms"] / base["median_ms"]:.2f}x' if base and base['median_ms'] else '-'
+        print(
+            f'{row["orders"]:>8} {row["case"]:<20} {row["median_ms"]:>10.2f} {row["min_ms"]:>9.2f} '
+            f'{row["queries"]:>8} {row["peak_kb"]:>9.1f} {ratio:>8}'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Микробенчмарки горячих путей заказов')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--items', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--cases', nargs='+', help='замерять только указанные случаи')
+    parser.add_argument('--output', help='файл для сохранения результатов в JSON')
+    parser.add_argument('--baseline', help='JSON предыдущего прогона для сравнения')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from .seed import seed_items, seed_orders
+
+    rng = random.Random(0)
+    results = []
+    with benchmark_database():
+        items = seed_items(args.items, rng)
+        seeded = 0
+        # объём данных наращивается от меньшего размера к большему в одной БД
+        for size in sorted(args.sizes):
+            seeded += seed_orders(size - seeded, items, rng)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            for name, func in get_cases(items, rng).items():
+                if args.cases and name not in args.cases:
+                    continue
+                results.append({'orders': size, 'case': name, **measure(func, args.repeat)})
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'created_at': datetime.now().isoformat(), 'args': vars(args), 'results': results}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
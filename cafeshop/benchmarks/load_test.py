@@ -0,0 +1,330 @@
+'''
+Нагрузочный тест "обеденного часа": проект запускается отдельным процессом под WSGI
+(runserver, gunicorn) или ASGI (uvicorn) сервером на наполненной тестовой БД, а заданное
+количество клиентов (планшетов) одновременно создаёт заказы, меняет статусы, читает
+и ищет заказы и опрашивает выручку. Для каждого маршрута orders.urls выводятся
+пропускная способность, p50/p95/p99 и доля ошибок.
+
+Запуск из директории cafeshop:
+    python -m benchmarks.load_test --orders 20000 --clients 10 50 100 --duration 30
+    python -m benchmarks.load_test --server uvicorn --workers 4 --mix create=5 status=5 list=1
+'''
+import os
+import sys
+import json
+import time
+import random
+import string
+import socket
+import argparse
+import threading
+import subprocess
+import http.client
+from collections import deque
+from datetime import datetime
+from urllib.parse import urlencode
+
+from django.urls import reverse
+
+from .utils import setup_django, benchmark_database, percentile
+
+
+# Доли действий клиентов по умолчанию: планшеты официантов создают заказы и меняют статусы,
+# кухня и касса читают списки и выручку
+DEFAULT_MIX = {'create': 30, 'status': 30, 'list': 20, 'search': 10, 'revenue': 10}
+# маршрут orders.urls и метод каждого действия
+ACTIONS = {
+    'create': ('orders:order-api-list', 'POST'),
+    'status': ('orders:order-api-ud', 'PUT'),
+    'list': ('orders:order-api-list', 'GET'),
+    'search': ('orders:order-api-list', 'GET'),
+    'revenue': ('orders:order-api-revenue', 'GET'),
+}
+SERVERS = ('runserver', 'gunicorn', 'uvicorn')
+SERVER_START_TIMEOUT = 30
+
+
+def get_server_command(server: str, port: int, workers: int, threads: int) -> list[str]:
+    '''Функция получения команды запуска сервера проекта'''
+    address = f'127.0.0.1:{port}'
+    if server == 'runserver':
+        return [sys.executable, 'manage.py', 'runserver', '--noreload', '--skip-checks', address]
+    if server == 'gunicorn':
+        return [
+            sys.executable, '-m', 'gunicorn', 'cafeshop.wsgi:application', '--bind', address,
+            '--workers', str(workers), '--threads', str(threads), '--log-level', 'warning',
+        ]
+    return [
+        sys.executable, '-m', 'uvicorn', 'cafeshop.asgi:application', '--host', '127.0.0.1',
+        '--port', str(port), '--workers', str(workers), '--log-level', 'warning', '--no-access-log',
+    ]
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(command: list[str], port: int, database: str, probe_url: str, verbose: bool) -> subprocess.Popen:
+    '''Функция запуска сервера на тестовой БД и ожидания его готовности'''
+    from django.conf import settings
+
+    env = {**os.environ, 'POSTGRESQL_DB': database}
+    process = subprocess.Popen(
+        command, cwd=settings.BASE_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=None if verbose else subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Сервер завершился с кодом {process.returncode}: {" ".join(command)}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', probe_url)
+            connection.getresponse().read()
+            connection.close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f'Сервер не ответил за {SERVER_START_TIMEOUT} секунд')
+
+
+def stop_server(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def parse_mix(values: list[str]) -> dict[str, int]:
+    '''Функция разбора долей действий вида create=30'''
+    mix = {}
+    for value in values:
+        name, _, weight = value.partition('=')
+        if name not in ACTIONS or not weight.isdigit():
+            raise argparse.ArgumentTypeError(f'Неверная доля действия {value!r}, действия: {", ".join(ACTIONS)}')
+        mix[name] = int(weight)
+    return mix
+
+
+# Заказы, статус которых ещё можно продвинуть; общие для всех клиентов
+class OrderPool:
+    def __init__(self, orders: list[tuple[int, str]]):
+        self.orders = deque(orders)
+
+    def take(self) -> tuple[int, str] | None:
+        try:
+            return self.orders.popleft()
+        except IndexError:
+            return None
+
+    def put(self, order_id: int, status: str):
+        self.orders.append((order_id, status))
+
+
+# Клиент (планшет) с постоянным HTTP соединением. Сервер проверяет CSRF для POST и PUT,
+# поэтому клиент, как браузер, отправляет одинаковый токен в cookie и заголовке
+class LoadClient:
+    def __init__(self, port: int, items: list[int], tables: int, pool: OrderPool, rng: random.Random):
+        self.items = items
+        self.tables = tables
+        self.pool = pool
+        self.rng = rng
+        token = ''.join(rng.choices(string.ascii_letters + string.digits, k=32))
+        self.headers = {'Cookie': f'csrftoken={token}', 'X-CSRFToken': token, 'Content-Type': 'application/json'}
+        self.connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+
+    def send(self, method: str, url: str, body: dict | None = None) -> tuple[int, bytes]:
+        payload = json.dumps(body) if body is not None else None
+        for attempt in range(2):
+            try:
+                self.connection.request(method, url, body=payload, headers=self.headers)
+                resp = self.connection.getresponse()
+                return resp.status, resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # сервер закрыл соединение keep-alive между запросами
+                self.connection.close()
+                if attempt:
+                    raise
+
+    def create(self) -> int:
+        items = [
+            {'id': item_id, 'count': self.rng.randint(1, 3)}
+            for item_id in self.rng.sample(self.items, self.rng.randint(1, 4))
+        ]
+        body = {'table_number': self.rng.randint(1, self.tables), 'items': items}
+        status, content = self.send('POST', reverse('orders:order-api-list'), body)
+        if status == 201:
+            self.pool.put(json.loads(content)['id'], 'В ожидании')
+        return status
+
+    def status(self) -> int | None:
+        order = self.pool.take()
+        if order is None:
+            return None
+        order_id, current = order
+        new_status = 'Готово' if current == 'В ожидании' else 'Оплачено'
+        status, _ = self.send('PUT', reverse('orders:order-api-ud', args=(order_id, )), {'status': new_status})
+        if status == 200 and new_status != 'Оплачено':
+            self.pool.put(order_id, new_status)
+        return status
+
+    def list(self) -> int:
+        return self.send('GET', f'{reverse("orders:order-api-list")}?limit=50')[0]
+
+    def search(self) -> int:
+        query = urlencode({'q': self.rng.randint(1, self.tables), 'limit': 50})
+        return self.send('GET', f'{reverse("orders:order-api-list")}?{query}')[0]
+
+    def revenue(self) -> int:
+        query = urlencode({'from': datetime.now().strftime('%Y-%m-%d')})
+        return self.send('GET', f'{reverse("orders:order-api-revenue")}?{query}')[0]
+
+
+def run_stage(make_client, clients: int, mix: dict[str, int], warmup: float, duration: float,
+              think_time: float) -> tuple[dict, float]:
+    '''Функция прогона нагрузки clients клиентами: замеры за duration секунд после прогрева'''
+    actions = list(mix)
+    weights = list(mix.values())
+    samples = []
+    lock = threading.Lock()
+    stop = threading.Event()
+    measure_from = time.perf_counter() + warmup
+
+    def worker(client: LoadClient):
+        local = []
+        while not stop.is_set():
+            action = client.rng.choices(actions, weights)[0]
+            started = time.perf_counter()
+            try:
+                status = getattr(client, action)()
+            except (OSError, http.client.HTTPException):
+                status = 0  # ошибка соединения или таймаут
+            finished = time.perf_counter()
+            if status is not None and started >= measure_from:
+                local.append((*ACTIONS[action], status, finished - started))
+            if think_time:
+                stop.wait(client.rng.expovariate(1 / think_time))
+        client.connection.close()
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(make_client(i), ), daemon=True) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(warmup + duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    routes = {}
+    for route, method, status, seconds in samples:
+        routes.setdefault((route, method), []).append((status, seconds))
+    return routes, duration
+
+
+def summarize(routes: dict, duration: float) -> list[dict]:
+    '''Функция расчёта пропускной способности, перцентилей и доли ошибок по маршрутам'''
+    rows = []
+    everything = []
+    for (route, method), results in sorted(routes.items()):
+        everything.extend(results)
+        rows.append(summarize_results(route, method, results, duration))
+    if everything:
+        rows.append(summarize_results('total', '', everything, duration))
+    return rows
+
+
+def summarize_results(route: str, method: str, results: list[tuple[int, float]], duration: float) -> dict:
+    latencies = [seconds for _, seconds in results]
+    errors = sum(1 for status, _ in results if status == 0 or status >= 400)
+    return {
+        'route': route,
+        'method': method,
+        'requests': len(results),
+        'rps': len(results) / duration,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'error_rate': errors / len(results),
+    }
+
+
+def print_stage(clients: int, rows: list[dict]):
+    print(f'\nclients: {clients}')
+    print(f'{"route":<28} {"method":<6} {"requests":>8} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    for row in rows:
+        print(
+            f'{row["route"]:<28} {row["method"]:<6} {row["requests"]:>8} {row["rps"]:>8.1f} {row["p50_ms"]:>8.1f} '
+            f'{row["p95_ms"]:>8.1f} {row["p99_ms"]:>8.1f} {row["error_rate"]:>7.1%}'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный тест API заказов')
+    parser.add_argument('--server', choices=SERVERS, default='runserver')
+    parser.add_argument('--workers', type=int, default=4, help='процессы gunicorn и uvicorn')
+    parser.add_argument('--threads', type=int, default=4, help='потоки процесса gunicorn')
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--items', type=int, default=30)
+    parser.add_argument('--tables', type=int, default=30)
+    parser.add_argument('--clients', type=int, nargs='+', default=[10, 50])
+    parser.add_argument('--duration', type=float, default=30, help='секунд замера на каждое число клиентов')
+    parser.add_argument('--warmup', type=float, default=5)
+    parser.add_argument('--think-time', type=float, default=0, help='средняя пауза клиента между запросами')
+    parser.add_argument('--mix', nargs='+', default=[], help='доли действий, например create=30 status=30 list=20')
+    parser.add_argument('--output', help='файл для сохранения результатов в JSON')
+    parser.add_argument('--verbose', action='store_true', help='показывать вывод сервера')
+    args = parser.parse_args()
+    try:
+        mix = {**DEFAULT_MIX, **parse_mix(args.mix)} if args.mix else DEFAULT_MIX
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    if not any(mix.values()):
+        parser.error('Хотя бы одно действие должно иметь ненулевую долю')
+
+    setup_django()
+    from django.db import connection
+    from orders.models import Order
+    from .seed import seed
+
+    port = get_free_port()
+    results = []
+    with benchmark_database():
+        items = [item.id for item in seed(items=args.items, orders=args.orders, tables=args.tables)]
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        pool = OrderPool(list(
+            Order.objects.exclude(status=Order.StatusType.PAID).values_list('id', 'status')
+        ))
+        database = connection.settings_dict['NAME']
+        # соединение бенчмарка не нужно серверу и не должно мешать удалению тестовой БД
+        connection.close()
+
+        command = get_server_command(args.server, port, args.workers, args.threads)
+        process = start_server(command, port, database, reverse('orders:order-api-revenue'), args.verbose)
+        try:
+            for clients in args.clients:
+                def make_client(i: int) -> LoadClient:
+                    return LoadClient(port, items, args.tables, pool, random.Random(f'{clients}-{i}'))
+
+                stage_routes, duration = run_stage(
+                    make_client, clients, mix, args.warmup, args.duration, args.think_time
+                )
+                rows = summarize(stage_routes, duration)
+                print_stage(clients, rows)
+                results.extend({'clients': clients, **row} for row in rows)
+        finally:
+            stop_server(process)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'created_at': datetime.now().isoformat(), 'args': vars(args), 'results': results}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from items.models import Item
+from orders.models import Order, OrderItemRelation
+from orders.signals import orders_created
+
+
+STATUS_WEIGHTS = {
+    Order.StatusType.PAID: 80,
+    Order.StatusType.READY: 10,
+    Order.StatusType.PENDING: 10,
+}
+LINES_WEIGHTS = {1: 30, 2: 30, 3: 20, 4: 10, 5: 5, 6: 3, 8: 1, 10: 1}
+
+
+@contextmanager
+def explicit_created_at():
+    '''Контекст, в котором created_at заказа берётся из объекта, а не из auto_now_add'''
+    field = Order._meta.get_field('created_at')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def seed_items(count: int, rng: random.Random) -> list[Item]:
+    '''Функция создания товаров со случайными ценами'''
+    return Item.objects.bulk_create([
+        Item(title=f'Товар {i}', price=Decimal(rng.randrange(50, 1500, 10)))
+        for i in range(1, count + 1)
+    ])
+
+
+def seed_orders(count: int, items: list[Item], rng: random.Random, days: int = 365,
+                tables: int = 30, batch_size: int = 1000) -> int:
+    '''Функция создания заказов с позициями, распределённых по последним days дням.
+    Витрина выручки обновляется так же, как при обычном создании заказов'''
+    now = timezone.now()
+    statuses = list(STATUS_WEIGHTS)
+    lines = list(LINES_WEIGHTS)
+    created = 0
+    with explicit_created_at():
+        while created < count:
+            size = min(batch_size, count - created)
+            orders = []
+            orders_lines = []
+            for _ in range(size):
+                order_lines = [
+                    (item, rng.randint(1, 4))
+                    for item in rng.sample(items, min(len(items), rng.choices(lines, LINES_WEIGHTS.values())[0]))
+                ]
+                created_at = now - timedelta(seconds=rng.randrange(days * 24 * 3600))
+                orders.append(Order(
+                    table_number=rng.randint(1, tables),
+                    status=rng.choices(statuses, STATUS_WEIGHTS.values())[0],
+                    created_at=created_at,
+                    total_price=sum(item.price * item_count for item, item_count in order_lines),
+                ))
+                orders_lines.append(order_lines)
+            with transaction.atomic():
+                Order.objects.bulk_create(orders)
+                OrderItemRelation.objects.bulk_create([
+                    OrderItemRelation(order=order, item=item, count=item_count, title=item.title, price=item.price)
+                    for order, order_lines in zip(orders, orders_lines)
+                    for item, item_count in order_lines
+                ])
+                orders_created.send(sender=Order, orders=orders)
+            created += size
+    return created
+
+
+def seed(items: int = 30, orders: int = 1000, seed_value: int = 0, **kwargs) -> list[Item]:
+    '''Функция наполнения БД синтетическими товарами и заказами'''
+    rng = random.Random(seed_value)
+    items_obj = seed_items(items, rng)
+    seed_orders(orders, items_obj, rng, **kwargs)
+    return items_obj
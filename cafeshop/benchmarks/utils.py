@@ -0,0 +1,33 @@
+import os
+import math
+from contextlib import contextmanager
+
+
+def setup_django():
+    '''Функция инициализации Django для запуска бенчмарков как скриптов'''
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cafeshop.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def benchmark_database(keepdb: bool = False):
+    '''Контекст с отдельной тестовой БД (test_<имя БД>), рабочие данные не затрагиваются'''
+    from django.test.utils import setup_databases, teardown_databases, override_settings
+
+    # DEBUG=True копит все запросы в connection.queries и искажает замеры
+    with override_settings(DEBUG=False):
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=keepdb)
+        try:
+            yield
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=keepdb)
+
+
+def percentile(values: list[float], q: float) -> float:
+    '''Функция получения перцентиля q (0..100) методом ближайшего ранга'''
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
@@ -0,0 +1,151 @@
+import random
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http.request import HttpRequest
+from django.http.response import HttpResponse, StreamingHttpResponse
+from django.template.response import SimpleTemplateResponse
+
+
+# Признак того, что обработка запроса только читает данные и может идти на реплику
+_replica_reads = ContextVar('replica_reads', default=False)
+# После записи в рамках запроса чтения возвращаются на основную БД
+_pinned = ContextVar('pinned_to_primary', default=False)
+
+PIN_COOKIE_NAME = 'db_primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+# Роутер: запись всегда в default, чтение - на случайную реплику, если запрос помечен как чтение
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and _replica_reads.get() and not _pinned.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        _pinned.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплики содержат те же данные, что и основная БД
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+def is_pinned_request(request: HttpRequest) -> bool:
+    '''Функция проверки, что клиент недавно писал и должен читать с основной БД'''
+    return request.method not in SAFE_METHODS or PIN_COOKIE_NAME in request.COOKIES
+
+
+# Признак чтения с реплики ставится только на время получения очередной части тела,
+# чтобы установка и сброс всегда происходили в одном контексте
+def iter_with_replica_reads(content, enabled: bool):
+    '''Генератор тела потокового ответа, читающий с реплики и после возврата из view'''
+    iterator = iter(content)
+    while True:
+        token, pinned_token = _replica_reads.set(enabled), _pinned.set(False)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _pinned.reset(pinned_token)
+            _replica_reads.reset(token)
+        yield chunk
+
+
+async def aiter_with_replica_reads(content, enabled: bool):
+    '''Асинхронная версия iter_with_replica_reads'''
+    iterator = aiter(content)
+    while True:
+        token, pinned_token = _replica_reads.set(enabled), _pinned.set(False)
+        try:
+            chunk = await anext(iterator)
+        except StopAsyncIteration:
+            return
+        finally:
+            _pinned.reset(pinned_token)
+            _replica_reads.reset(token)
+        yield chunk
+
+
+def finish_replica_response(response: HttpResponse, enabled: bool) -> HttpResponse:
+    '''Функция выполнения отложенных чтений ответа (шаблон, потоковое тело) в режиме реплики'''
+    if isinstance(response, StreamingHttpResponse):
+        # тело читается уже вне запроса, поэтому запись во view учитывается здесь
+        enabled = enabled and not _pinned.get()
+        if response.is_async:
+            response.streaming_content = aiter_with_replica_reads(response.streaming_content, enabled)
+        else:
+            response.streaming_content = iter_with_replica_reads(response.streaming_content, enabled)
+    elif isinstance(response, SimpleTemplateResponse) and not response.is_rendered:
+        # queryset ListView вычисляется при рендеринге шаблона, уже после выхода из view
+        response.render()
+    return response
+
+
+def use_replica(view):
+    '''Декоратор view, чтения которого (GET и HEAD) можно отправлять на реплики'''
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request: HttpRequest, *args, **kwargs):
+            enabled = not is_pinned_request(request)
+            token = _replica_reads.set(enabled)
+            try:
+                return finish_replica_response(await view(request, *args, **kwargs), enabled)
+            finally:
+                _replica_reads.reset(token)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs):
+        enabled = not is_pinned_request(request)
+        token = _replica_reads.set(enabled)
+        try:
+            return finish_replica_response(view(request, *args, **kwargs), enabled)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
+
+
+# Middleware чтения своих записей: после изменяющего запроса клиент на время задержки
+# репликации получает cookie и его чтения идут на основную БД (например, список после создания заказа)
+class PrimaryPinMiddleware:
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # признак записи не должен переходить к следующему запросу того же потока
+        token = _pinned.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self.pin_client(request, response)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        token = _pinned.set(False)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self.pin_client(request, response)
+
+    def pin_client(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        if settings.DATABASE_REPLICAS and request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE_NAME, '1', max_age=settings.DATABASE_REPLICA_PIN_SECONDS, httponly=True, samesite='Lax'
+            )
+        return response
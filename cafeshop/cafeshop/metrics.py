@@ -0,0 +1,151 @@
+import time
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http.request import HttpRequest
+from django.http.response import HttpResponse
+
+
+# Границы корзин гистограммы времени ответа в секундах (как в клиентах Prometheus)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+# Метрики одного маршрута: гистограмма времени ответа и счётчики SQL
+class RouteMetrics:
+    __slots__ = ('buckets', 'count', 'seconds', 'queries', 'sql_seconds')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.queries = 0
+        self.sql_seconds = 0.0
+
+
+# Метрики процесса; при нескольких воркерах каждый отдаёт свои
+class MetricsRegistry:
+    def __init__(self):
+        self.routes = {}
+        self.lock = threading.Lock()
+
+    def observe(self, view: str, method: str, seconds: float, queries: int, sql_seconds: float):
+        with self.lock:
+            route = self.routes.get((view, method))
+            if route is None:
+                route = self.routes[view, method] = RouteMetrics()
+            route.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            route.count += 1
+            route.seconds += seconds
+            route.queries += queries
+            route.sql_seconds += sql_seconds
+
+    def reset(self):
+        with self.lock:
+            self.routes = {}
+
+    def render(self) -> str:
+        '''Функция вывода метрик в текстовом формате Prometheus'''
+        with self.lock:
+            routes = sorted(self.routes.items())
+            lines = [
+                '# HELP http_request_duration_seconds Время обработки запроса.',
+                '# TYPE http_request_duration_seconds histogram',
+            ]
+            for (view, method), route in routes:
+                labels = f'view="{view}",method="{method}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ('+Inf', ), route.buckets):
+                    cumulative += count
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'http_request_duration_seconds_sum{{{labels}}} {route.seconds:.6f}')
+                lines.append(f'http_request_duration_seconds_count{{{labels}}} {route.count}')
+            for name, help_text, attr, fmt in (
+                ('db_queries_total', 'Количество SQL запросов.', 'queries', '{}'),
+                ('db_query_duration_seconds_total', 'Время выполнения SQL запросов.', 'sql_seconds', '{:.6f}'),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for (view, method), route in routes:
+                    value = fmt.format(getattr(route, attr))
+                    lines.append(f'{name}{{view="{view}",method="{method}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# счётчики SQL текущего запроса; контекст переходит и в потоки sync_to_async
+_current_sql = ContextVar('current_sql', default=None)
+
+
+def query_wrapper(execute, sql, params, many, context):
+    '''Обёртка выполнения SQL, считающая запросы и время текущего HTTP запроса'''
+    stats = _current_sql.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - started
+
+
+def install_query_wrapper(connection, **kwargs):
+    if query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_wrapper)
+
+
+connection_created.connect(install_query_wrapper)
+
+
+def get_view_name(request: HttpRequest) -> str:
+    match = request.resolver_match
+    return match.view_name if match else '<unresolved>'
+
+
+# Middleware сбора метрик. Для потоковых ответов учитывается время до начала отдачи тела
+class MetricsMiddleware:
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # соединения, открытые до загрузки middleware, не получали сигнал connection_created
+        for connection in connections.all(initialized_only=True):
+            install_query_wrapper(connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = [0, 0.0]
+        token = _current_sql.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_sql.reset(token)
+        registry.observe(get_view_name(request), request.method, time.perf_counter() - started, *stats)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        stats = [0, 0.0]
+        token = _current_sql.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_sql.reset(token)
+        registry.observe(get_view_name(request), request.method, time.perf_counter() - started, *stats)
+        return response
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    '''View с метриками в текстовом формате Prometheus'''
+    return HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -57,6 +57,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'cafeshop.metrics.MetricsMiddleware',
+    'cafeshop.db_router.PrimaryPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -102,6 +104,44 @@ DATABASES = {
 }
 os.environ.get('POSTGRESQL_DB')
 
+# Реплики для чтения: хосты через запятую, например POSTGRESQL_REPLICA_HOSTS=replica1,replica2.
+# Чтения view, помеченных use_replica, идут на случайную реплику, запись - всегда в default
+DATABASE_REPLICAS = []
+for number, host in enumerate(env.list('POSTGRESQL_REPLICA_HOSTS', default=[]), start=1):
+    DATABASES[f'replica{number}'] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['cafeshop.db_router.ReplicaRouter']
+# сколько секунд после записи клиент читает с основной БД (задержка репликации)
+DATABASE_REPLICA_PIN_SECONDS = 5
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Версия каталога товаров хранится в кэше, поэтому при нескольких воркерах
+# нужен общий бэкенд, например CACHE_URL=redis://localhost:6379/0
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Поток событий заказов (SSE): database - журнал в таблице, memory - в памяти процесса (для тестов)
+ORDER_EVENTS_BACKEND = env('ORDER_EVENTS_BACKEND', default='database')
+ORDER_EVENTS_POLL_INTERVAL = 0.2
+ORDER_EVENTS_HEARTBEAT = 15
+ORDER_EVENTS_STREAM_TIMEOUT = 60
+# задержка свежих записей журнала; вместе с интервалом опроса должна быть меньше секунды
+ORDER_EVENTS_COMMIT_LAG = 0.2
+
+# Срок хранения ключей идемпотентности POST запросов создания заказов, в секундах
+ORDER_IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# Создание заказов: sync - сразу в запросе, queue - через очередь заявок и воркер process_order_queue
+ORDER_INGEST_MODE = env('ORDER_INGEST_MODE', default='sync')
+
+# HTML списки заказов: размер страницы и время жизни кэша строки заказа в секундах
+# (ключ строки включает updated_at, поэтому изменённый заказ рендерится заново)
+ORDER_LIST_PAGE_SIZE = 50
+ORDER_ROW_CACHE_TIMEOUT = 60 * 60
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -0,0 +1,9 @@
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+
+# Настройки для тестов: python manage.py test --settings=cafeshop.test_settings.
+# Реплика - отдельное соединение-зеркало тестовой БД default; роутер на неё переключается
+# только в тестах роутера, остальные тесты работают с одной БД
+DATABASES.setdefault('replica1', {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}})
+DATABASE_REPLICAS = []
@@ -0,0 +1,24 @@
+from django.http.request import HttpRequest
+from django.http.response import JsonResponse
+
+from .catalog import get_catalog, get_catalog_version
+
+
+# API каталога товаров
+def get_catalog_api(request: HttpRequest) -> JsonResponse:
+    '''Функция получения каталога товаров с его версией'''
+    if request.method != 'GET':
+        status = 405
+        data = {'msg': 'method not allowed'}
+        return JsonResponse(data=data, status=status, safe=False)
+    data = {
+        'version': get_catalog_version(),
+        'items': [
+            {
+                'id': item.id,
+                'title': item.title,
+                'price': item.price
+            } for item in get_catalog().values()
+        ]
+    }
+    return JsonResponse(data=data, status=200, safe=False)
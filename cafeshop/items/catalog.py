@@ -0,0 +1,66 @@
+import threading
+
+from django.db import connection
+from django.db.models import Subquery
+
+from .models import Item, CatalogVersion
+
+
+CATALOG_VERSION_ID = 1
+CATALOG_VERSION_SEQUENCE = 'items_catalog_version_seq'
+
+# локальная копия каталога процесса: (версия, {id: Item})
+_catalog = (None, {})
+_catalog_lock = threading.Lock()
+
+
+def get_catalog_version() -> int:
+    '''Функция получения текущей версии каталога (одна строка в БД, общая для всех процессов)'''
+    return CatalogVersion.objects.filter(pk=CATALOG_VERSION_ID).values_list('version', flat=True).first() or 0
+
+
+def get_catalog_version_subquery() -> Subquery:
+    '''Функция получения версии каталога как подзапроса, чтобы читать её в одном запросе с другими данными'''
+    return Subquery(CatalogVersion.objects.filter(pk=CATALOG_VERSION_ID).values('version')[:1])
+
+
+# Версия меняется в транзакции изменения товара: новая версия и новые товары становятся
+# видны другим процессам одним коммитом. Номер берётся из последовательности, а не как
+# version + 1: последовательность не откатывается, поэтому версия из отменённой транзакции
+# (каталог с её товарами мог попасть в локальную копию процесса) не достанется другим данным
+def invalidate_catalog():
+    '''Функция смены версии каталога'''
+    table = connection.ops.quote_name(CatalogVersion._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            INSERT INTO {table} (id, version) VALUES (%s, nextval(%s))
+            ON CONFLICT (id) DO UPDATE SET version = EXCLUDED.version
+            ''',
+            [CATALOG_VERSION_ID, CATALOG_VERSION_SEQUENCE]
+        )
+
+
+def get_catalog() -> dict[int, Item]:
+    '''Функция получения каталога товаров {id: Item}. Объекты общие, изменять их нельзя'''
+    global _catalog
+    version = get_catalog_version()
+    cached_version, items = _catalog
+    if cached_version == version:
+        return items
+    with _catalog_lock:
+        cached_version, items = _catalog
+        if cached_version != version:
+            items = {item.id: item for item in Item.objects.order_by('id')}
+            _catalog = (version, items)
+    return items
+
+
+def get_catalog_items(item_ids) -> dict[int, Item]:
+    '''Функция получения товаров по id из каталога, отсутствующие в кэше ищутся в БД'''
+    catalog = get_catalog()
+    found = {item_id: catalog[item_id] for item_id in item_ids if item_id in catalog}
+    missing = [item_id for item_id in item_ids if item_id not in catalog]
+    if missing:
+        found.update(Item.objects.in_bulk(missing))
+    return found
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunSQL(
+            'CREATE SEQUENCE items_catalog_version_seq',
+            'DROP SEQUENCE items_catalog_version_seq',
+        ),
+    ]
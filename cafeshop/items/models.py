@@ -7,3 +7,9 @@ class Item(models.Model):
 
     def __str__(self):
         return f'{self.title} price: {self.price}'
+
+
+# Версия каталога товаров: одна строка, которую увеличивает каждое изменение товаров.
+# Хранится в БД, а не в кэше, чтобы её видели все процессы при любом бэкенде кэша
+class CatalogVersion(models.Model):
+    version = models.BigIntegerField(default=0)
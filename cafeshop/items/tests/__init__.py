@@ -0,0 +1,4 @@
+import os
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cafeshop.settings')
+import django
+django.setup()
\ No newline at end of file
@@ -0,0 +1,52 @@
+from django.test import TestCase
+from django.urls import reverse
+from items.catalog import get_catalog, get_catalog_version
+from items.models import Item
+
+
+# Кэш каталога товаров
+class CatalogTestCase(TestCase):
+
+    def setUp(self):
+        self.item1 = Item.objects.create(title='Кофе', price=150)
+        self.item2 = Item.objects.create(title='Торт', price=250)
+        return super().setUp()
+
+    def test_catalog_cached_until_item_changes(self):
+        get_catalog()
+        # только проверка версии каталога
+        with self.assertNumQueries(1):
+            catalog = get_catalog()
+        self.assertEqual(list(catalog), [self.item1.id, self.item2.id])
+
+        version = get_catalog_version()
+        self.item1.price = 170
+        self.item1.save()
+        self.assertNotEqual(get_catalog_version(), version)
+        self.assertEqual(get_catalog()[self.item1.id].price, 170)
+
+        self.item2.delete()
+        self.assertNotIn(self.item2.id, get_catalog())
+
+    def test_catalog_api(self):
+        resp = self.client.get(reverse('items:item-api-catalog'))
+        self.assertEqual(resp.status_code, 200, 'Неверный статус')
+        self.assertEqual(resp.json()['version'], get_catalog_version())
+        self.assertEqual(resp.json()['items'], [
+            {'id': item.id, 'title': item.title, 'price': '{:.2f}'.format(item.price)}
+            for item in (self.item1, self.item2)
+        ])
+
+    def test_items_list_view(self):
+        get_catalog()
+        with self.assertNumQueries(1):
+            resp = self.client.get(reverse('items:item-list'))
+        self.assertEqual(resp.status_code, 200, 'Неверный статус')
+        self.assertEqual(resp.context['items'], [self.item1, self.item2])
+
+    def test_order_form_uses_catalog(self):
+        get_catalog()
+        # только проверки версии каталога: список товаров формы строится дважды
+        with self.assertNumQueries(2):
+            resp = self.client.get(reverse('orders:order-create'))
+        self.assertContains(resp, str(self.item2))
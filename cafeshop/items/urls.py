@@ -1,9 +1,17 @@
-from django.urls import path
+from django.urls import path, include
 
 from . import views
+from . import api_views
 
 app_name = 'items'
 
+api_urls = [
+    path('api/v1/items', api_views.get_catalog_api, name='item-api-catalog'),
+]
+
 urlpatterns = [
-    path('', views.ItemsListView.as_view(), name='item-list'),
+    path('items', views.ItemsListView.as_view(), name='item-list'),
+
+    # API
+    path('api/', include(api_urls))
 ]
@@ -1,15 +1,17 @@
 from django.views.generic import ListView
 
+from .catalog import get_catalog
 from .models import Item
 
 # Вьюшка отображения списка товаров (нет никакого функционала)
 class ItemsListView(ListView):
-    template_name = 'templates/items/items.html'
+    template_name = 'items/item_list.html'
     model = Item
     context_object_name = 'items'
 
     def get_queryset(self):
-        return super().get_queryset()
+        # список товаров берётся из кэша каталога
+        return list(get_catalog().values())
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
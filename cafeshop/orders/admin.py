@@ -1,9 +1,10 @@
 from django.contrib import admin
 
-from .models import Order, OrderItemRelation
+from .models import Order, OrderItemRelation, RevenueRollup
 
 
 # Register your models here.
 # Зарегистрировал объекты в админке
 admin.site.register(Order)
 admin.site.register(OrderItemRelation)
+admin.site.register(RevenueRollup)
@@ -0,0 +1,106 @@
+import hashlib
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db.models import Count, F, Max, Sum, QuerySet
+from django.db.models.functions import ExtractHour
+
+from .models import OrderItemRelation, ArchivedOrderItemRelation
+
+
+ANALYTICS_CACHE_TIMEOUT = 60
+ANALYTICS_TOP_ITEMS = 20
+LINE_REVENUE = Sum(F('price') * F('count'))
+
+
+def get_lines(date_from: datetime | None, date_to: datetime | None, status: str | None,
+              model=OrderItemRelation) -> QuerySet:
+    '''Функция получения позиций заказов (текущих или архивных) за период [date_from, date_to) с нужным статусом'''
+    lines = model.objects.all()
+    if date_from:
+        lines = lines.filter(order__created_at__gte=date_from)
+    if date_to:
+        lines = lines.filter(order__created_at__lt=date_to)
+    if status:
+        lines = lines.filter(order__status=status)
+    return lines
+
+
+# Каждая разбивка - один GROUP BY запрос; выручка считается по цене позиции на момент заказа
+def get_items_breakdown(lines: QuerySet, limit: int | None = ANALYTICS_TOP_ITEMS) -> list[dict]:
+    '''Функция получения самых продаваемых товаров по выручке и количеству'''
+    return list(
+        lines.values('item_id').annotate(
+            title=Max('title'), quantity=Sum('count'), revenue=LINE_REVENUE
+        ).order_by('-revenue', '-quantity', 'item_id')[:limit]
+    )
+
+
+def get_tables_breakdown(lines: QuerySet) -> list[dict]:
+    '''Функция получения выручки по номерам столов'''
+    return list(
+        lines.values(table_number=F('order__table_number')).annotate(
+            orders_count=Count('order_id', distinct=True), revenue=LINE_REVENUE
+        ).order_by('table_number')
+    )
+
+
+def get_hours_breakdown(lines: QuerySet) -> list[dict]:
+    '''Функция получения выручки по часам суток (в часовом поясе проекта)'''
+    return list(
+        lines.values(hour=ExtractHour('order__created_at')).annotate(
+            orders_count=Count('order_id', distinct=True), revenue=LINE_REVENUE
+        ).order_by('hour')
+    )
+
+
+def merge_breakdowns(breakdowns: list[list[dict]], key: str) -> list[dict]:
+    '''Функция сложения разбивок по текущим и архивным позициям по ключу key'''
+    merged = {}
+    for rows in breakdowns:
+        for row in rows:
+            current = merged.get(row[key])
+            if current is None:
+                merged[row[key]] = dict(row)
+                continue
+            for field, value in row.items():
+                if field not in (key, 'title'):
+                    current[field] += value
+    return list(merged.values())
+
+
+# Архивные позиции считаются теми же GROUP BY запросами по архивным таблицам и складываются
+# с текущими: заказ лежит либо в рабочих таблицах, либо в архиве, поэтому счётчики не пересекаются
+def get_archived_analytics(lines: QuerySet, archived_lines: QuerySet) -> dict:
+    '''Функция получения аналитики продаж вместе с архивными заказами'''
+    items = merge_breakdowns(
+        [get_items_breakdown(lines, limit=None), get_items_breakdown(archived_lines, limit=None)], 'item_id'
+    )
+    items.sort(key=lambda row: (-row['revenue'], -row['quantity'], row['item_id']))
+    tables = merge_breakdowns([get_tables_breakdown(lines), get_tables_breakdown(archived_lines)], 'table_number')
+    hours = merge_breakdowns([get_hours_breakdown(lines), get_hours_breakdown(archived_lines)], 'hour')
+    return {
+        'items': items[:ANALYTICS_TOP_ITEMS],
+        'tables': sorted(tables, key=lambda row: row['table_number']),
+        'hours': sorted(hours, key=lambda row: row['hour']),
+    }
+
+
+def get_analytics(date_from: datetime | None = None, date_to: datetime | None = None,
+                  status: str | None = None, include_archived: bool = False) -> dict:
+    '''Функция получения аналитики продаж с кэшированием на ANALYTICS_CACHE_TIMEOUT секунд'''
+    raw = ':'.join(str(value) for value in (date_from, date_to, status, include_archived))
+    key = f'orders:analytics:{hashlib.md5(raw.encode()).hexdigest()}'
+    data = cache.get(key)
+    if data is None:
+        lines = get_lines(date_from, date_to, status)
+        if include_archived:
+            data = get_archived_analytics(lines, get_lines(date_from, date_to, status, ArchivedOrderItemRelation))
+        else:
+            data = {
+                'items': get_items_breakdown(lines),
+                'tables': get_tables_breakdown(lines),
+                'hours': get_hours_breakdown(lines),
+            }
+        cache.set(key, data, ANALYTICS_CACHE_TIMEOUT)
+    return data
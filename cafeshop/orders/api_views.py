@@ -1,47 +1,56 @@
 import json
+from functools import partial
 
-from django.db.models import Sum
 from django.http.request import HttpRequest
-from django.http.response import JsonResponse
-from django.contrib.postgres.search import SearchVector
+from django.conf import settings
+from django.http.response import JsonResponse, StreamingHttpResponse
 
-from orders.models import Order, OrderItemRelation
-from .funcs import get_api_queryset, get_orders_json, find_items_in_order
+from cafeshop.db_router import use_replica
+from orders.models import Order, OrderTicket
+from .funcs import (
+    get_api_queryset, get_orders_json, get_serializer_fields, serialize_orders, paginate_orders,
+    search_orders, create_orders,
+    get_date_range, get_revenue_date_range, filter_date_range, get_include_archived, validate_status_filter,
+    validate_order_ids, update_orders_status, delete_orders,
+    change_order_status, validate_order_version, get_status_conflict, ORDERS_PAGE_SIZE, ORDERS_MAX_BATCH_SIZE
+)
+from .rollup import get_revenue_total
+from .conditional import orders_condition
+from .idempotency import handle_idempotent
+from .ingest import enqueue_order, get_ticket_json
+from .export import get_export_rows, iter_csv
+from .analytics import get_analytics
+from .tabs import get_open_tabs, get_open_tab, settle_table
+from .streaming import get_stream_mode, get_streaming_response, stream_orders, stream_revenue
 
 
 def create_order_api(request: HttpRequest) -> tuple[dict, int]:
     '''Функция создания заказа'''
     request_body = json.loads(request.body)
-    items = request_body.get('items') 
-    table_number = request_body.get('table_number')
     try:
-        if table_number < 1:
-            raise Exception('table_number не может быть меньше 1.')
-        if len(items) == 0 or len(items) > 10:
-            raise Exception('items не может быть пустым и иметь размер больше 10.')
-        
-        items_obj, total_price = find_items_in_order(items)
-        order = Order.objects.create(table_number=table_number)
-        order_items = []
-
-        for item, item_count in items_obj:
-            order_item = OrderItemRelation.objects.create(order=order, item=item, count=item_count)
-            order_items.append(order_item)
-            
+        if settings.ORDER_INGEST_MODE == 'queue':
+            # заказ будет создан воркером, клиент получает номер заявки
+            data = get_ticket_json(enqueue_order(request_body))
+            status = 202
+        else:
+            data = create_orders([request_body])[0]
+            status = 201
+    except Exception as e:
+        data = {'error': str(e)}
+        status = 400
+    return data, status
+
+
+def create_orders_batch_api(request: HttpRequest) -> tuple[list | dict, int]:
+    '''Функция пакетного создания заказов (синхронизация POS-терминалов)'''
+    orders_data = json.loads(request.body)
+    try:
+        if not isinstance(orders_data, list) or len(orders_data) == 0:
+            raise Exception('Ожидается непустой массив заказов.')
+        if len(orders_data) > ORDERS_MAX_BATCH_SIZE:
+            raise Exception(f'Нельзя создать больше {ORDERS_MAX_BATCH_SIZE} заказов за раз.')
+        data = create_orders(orders_data)
         status = 201
-        data = {
-            'id': order.id,
-            'status': order.status,
-            'table_number': order.table_number,
-            'items': [
-                {
-                    'id': rel.item.id,
-                    'title': rel.item.title,
-                    'price': rel.item.price
-                } for rel in order_items
-            ],
-            'total_price': total_price
-        }
     except Exception as e:
         data = {'error': str(e)}
         status = 400
@@ -50,15 +59,25 @@ def create_order_api(request: HttpRequest) -> tuple[dict, int]:
 
 def get_orders_api(request: HttpRequest) -> tuple[dict, int]:
     '''Функция получения списка заказов'''
-    orders = get_api_queryset()
-    search_query = request.GET.get('q')
-    if search_query:
-        orders = orders.annotate(
-                        search=SearchVector("table_number", "status"),
-                    ).filter(search=search_query)
-    
-    data = get_orders_json(orders)
-    return data, 200
+    orders = search_orders(get_api_queryset(), request.GET.get('q'))
+
+    # без limit/cursor отдаём полный список, как и раньше
+    limit = request.GET.get('limit')
+    cursor = request.GET.get('cursor')
+    try:
+        fields, include_items = get_serializer_fields(request.GET)
+        if limit is None and cursor is None:
+            return serialize_orders(orders, fields, include_items), 200
+        page, next_cursor = paginate_orders(orders, int(limit or ORDERS_PAGE_SIZE), cursor)
+        data = {
+            'results': serialize_orders(page, fields, include_items),
+            'next': next_cursor
+        }
+        status = 200
+    except Exception as e:
+        data = {'error': str(e)}
+        status = 400
+    return data, status
 
 
 def delete_order_api(pk: int) -> tuple[dict, int]:
@@ -76,28 +95,61 @@ def delete_order_api(pk: int) -> tuple[dict, int]:
 def update_order_api(request: HttpRequest, pk: int) -> tuple[dict, int]:
     '''Функция обновления статуса заказа'''
     body = json.loads(request.body)
-    data = body.get('status')
     status_order = body.get('status')
     values = Order.StatusType.values
     try:
         if status_order not in values:
             raise Exception(f'Неизвестный статус. Выберите статус из списка: {values}')
-        Order.objects.filter(id=pk).update(status=status_order)
+        # version необязательна: без неё проверяется только таблица переходов
+        version = validate_order_version(body.get('version'))
+        order = change_order_status(pk, status_order, version)
+        if order is None:
+            return get_status_conflict(pk, status_order, version)
         status = 200
-        data = {'msg': 'field update success'}
+        data = {'msg': 'field update success', 'version': order.version}
     except Exception as e:
         status = 400
         data = {'error': str(e)}
     return data, status
 
 
+def bulk_orders_api(request: HttpRequest) -> tuple[dict, int]:
+    '''Функция пакетной смены статуса или удаления заказов'''
+    body = json.loads(request.body)
+    action = body.get('action')
+    values = Order.StatusType.values
+    try:
+        ids = validate_order_ids(body.get('ids'))
+        if action == 'status':
+            status_order = body.get('status')
+            if status_order not in values:
+                raise Exception(f'Неизвестный статус. Выберите статус из списка: {values}')
+            succeeded, failed = update_orders_status(ids, status_order)
+        elif action == 'delete':
+            succeeded, failed = delete_orders(ids)
+        else:
+            raise Exception('Неизвестное действие. Выберите status или delete.')
+        data = {'succeeded': succeeded, 'failed': failed}
+        status = 200
+    except Exception as e:
+        data = {'error': str(e)}
+        status = 400
+    return data, status
+
+
 # API получения списка заказов и создания нового
+@use_replica
+@orders_condition
 def orders_list_rest_api(request: HttpRequest) -> JsonResponse:
     '''View для обработки POST и GET запроса по одному адресу'''
     data = {}
     if request.method == 'POST':
-        data, status = create_order_api(request)
+        data, status = handle_idempotent(request, create_order_api)
     elif request.method == 'GET': # обработка GET запроса
+        mode = get_stream_mode(request)
+        if mode:
+            orders = search_orders(get_api_queryset(), request.GET.get('q'))
+            return get_streaming_response(stream_orders(orders, mode), mode)
         data, status = get_orders_api(request)
     else:
         status = 405
@@ -105,6 +157,44 @@ def orders_list_rest_api(request: HttpRequest) -> JsonResponse:
     return JsonResponse(data=data, status=status, safe=False)
     
 
+# API пакетного создания заказов
+def orders_batch_rest_api(request: HttpRequest) -> JsonResponse:
+    '''View для обработки POST запроса с массивом заказов'''
+    if request.method == 'POST':
+        data, status = handle_idempotent(request, create_orders_batch_api)
+    else:
+        status = 405
+        data = {'msg': 'method not allowed'}
+    return JsonResponse(data=data, status=status, safe=False)
+
+
+# API пакетной смены статуса и удаления заказов (закрытие смены)
+def orders_bulk_rest_api(request: HttpRequest) -> JsonResponse:
+    '''View для обработки POST запроса со списком id и действием'''
+    if request.method == 'POST':
+        data, status = bulk_orders_api(request)
+    else:
+        status = 405
+        data = {'msg': 'method not allowed'}
+    return JsonResponse(data=data, status=status, safe=False)
+
+
+# статус заявки на создание заказа из очереди
+def order_ticket_api(request: HttpRequest, pk: int) -> JsonResponse:
+    '''View получения статуса заявки на создание заказа'''
+    if request.method != 'GET':
+        status = 405
+        data = {'msg': 'method not allowed'}
+        return JsonResponse(data=data, status=status, safe=False)
+    try:
+        data = get_ticket_json(OrderTicket.objects.get(id=pk))
+        status = 200
+    except OrderTicket.DoesNotExist:
+        data = {'error': 'Заявка не найдена.'}
+        status = 404
+    return JsonResponse(data=data, status=status, safe=False)
+
+
 # функция апдейта и удаления заказа
 def order_update_delete_api(request: HttpRequest, pk: int) -> JsonResponse:
     '''View для обработки PUT и DELETE запроса по одному адресу'''
@@ -119,18 +209,105 @@ def order_update_delete_api(request: HttpRequest, pk: int) -> JsonResponse:
 
 
 # получение выручки 
+@use_replica
+@orders_condition
 def get_revenue(request: HttpRequest) -> JsonResponse:
     '''Функция для получения информации о выручке и списком оплаченных заказов'''
     if request.method != 'GET':
         status = 405
         data = {'msg': 'method not allowed'}
         return JsonResponse(data=data, status=status, safe=False) 
+    try:
+        date_from, date_to = get_revenue_date_range(request.GET)
+    except Exception as e:
+        return JsonResponse(data={'error': str(e)}, status=400, safe=False)
     status=200
-    orders = get_api_queryset().filter(status='Готово')
+    orders = filter_date_range(get_api_queryset().filter(status='Готово'), date_from, date_to)
+    get_total = partial(get_revenue_total, 'Готово', date_from, date_to, get_include_archived(request.GET))
+    mode = get_stream_mode(request)
+    if mode:
+        return get_streaming_response(stream_revenue(orders, mode, get_total), mode)
     orders_list = get_orders_json(orders)
-    total = orders.aggregate(total=Sum('total_price')).get('total')
+    total = get_total()
     data = {
         'total': total,
         'orders': orders_list 
     }
-    return JsonResponse(data=data, status=status, safe=False)
\ No newline at end of file
+    return JsonResponse(data=data, status=status, safe=False)
+
+
+# выгрузка позиций заказов в CSV для бухгалтерии
+@use_replica
+def export_orders_api(request: HttpRequest) -> StreamingHttpResponse | JsonResponse:
+    '''View потоковой выгрузки позиций заказов в CSV с фильтрами from, to и status'''
+    if request.method != 'GET':
+        status = 405
+        data = {'msg': 'method not allowed'}
+        return JsonResponse(data=data, status=status, safe=False)
+    try:
+        date_from, date_to = get_date_range(request.GET)
+        status_order = validate_status_filter(request.GET.get('status'))
+    except Exception as e:
+        return JsonResponse(data={'error': str(e)}, status=400, safe=False)
+    response = StreamingHttpResponse(
+        iter_csv(get_export_rows(date_from, date_to, status_order, get_include_archived(request.GET))),
+        content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = 'attachment; filename="orders.csv"'
+    return response
+
+
+# аналитика продаж для панели управляющего
+@use_replica
+def get_analytics_api(request: HttpRequest) -> JsonResponse:
+    '''View выручки в разрезе товаров, столов и часов суток с фильтрами from, to и status'''
+    if request.method != 'GET':
+        status = 405
+        data = {'msg': 'method not allowed'}
+        return JsonResponse(data=data, status=status, safe=False)
+    try:
+        date_from, date_to = get_date_range(request.GET)
+        status_order = validate_status_filter(request.GET.get('status'))
+    except Exception as e:
+        return JsonResponse(data={'error': str(e)}, status=400, safe=False)
+    data = get_analytics(date_from, date_to, status_order, get_include_archived(request.GET))
+    return JsonResponse(data=data, status=200, safe=False)
+
+
+# открытые счета столов для официантов: все столы или один стол
+@use_replica
+def open_tabs_api(request: HttpRequest, table_number: int | None = None) -> JsonResponse:
+    '''View неоплаченных заказов, объединённых позиций и суммы по столам'''
+    if request.method != 'GET':
+        status = 405
+        data = {'msg': 'method not allowed'}
+        return JsonResponse(data=data, status=status, safe=False)
+    data = get_open_tabs() if table_number is None else get_open_tab(table_number)
+    return JsonResponse(data=data, status=200, safe=False)
+
+
+def settle_table_api(request: HttpRequest, table_number: int) -> tuple[dict, int]:
+    '''Функция закрытия счёта стола: все неоплаченные заказы или заказы ids из счёта'''
+    body = json.loads(request.body or '{}')
+    try:
+        ids = body.get('ids')
+        if ids is not None:
+            ids = validate_order_ids(ids)
+        succeeded, failed, total = settle_table(table_number, ids)
+        data = {'succeeded': succeeded, 'failed': failed, 'total': total}
+        status = 200
+    except Exception as e:
+        data = {'error': str(e)}
+        status = 400
+    return data, status
+
+
+# закрытие счёта стола
+def settle_table_rest_api(request: HttpRequest, table_number: int) -> JsonResponse:
+    '''View перевода неоплаченных заказов стола в статус Оплачено'''
+    if request.method == 'POST':
+        data, status = settle_table_api(request, table_number)
+    else:
+        status = 405
+        data = {'msg': 'method not allowed'}
+    return JsonResponse(data=data, status=status, safe=False)
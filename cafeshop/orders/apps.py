@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'orders'
+
+
+    def ready(self):
+        from . import rollup, conditional, events  # noqa: F401 подключение обработчиков сигналов
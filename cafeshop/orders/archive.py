@@ -0,0 +1,62 @@
+import time
+from datetime import datetime
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .funcs import delete_order_rows
+from .models import Order, OrderItemRelation, ArchivedOrder, ArchivedOrderItemRelation
+from .signals import orders_archived
+
+
+ARCHIVE_BATCH_SIZE = 1000
+
+
+# Перенос одной пачки: блокируются только строки пачки, занятые другими транзакциями пропускаются
+def archive_orders_batch(border: datetime, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    '''Функция переноса в архив оплаченных заказов, созданных раньше border, возвращает их количество'''
+    with transaction.atomic():
+        orders = list(
+            Order.objects.select_for_update(skip_locked=True).filter(
+                status=Order.StatusType.PAID, created_at__lt=border
+            ).order_by('id').only('id', 'table_number', 'status', 'created_at', 'total_price')[:batch_size]
+        )
+        if not orders:
+            return 0
+        ids = [order.id for order in orders]
+        order_table = Order._meta.db_table
+        relation_table = OrderItemRelation._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'''
+                INSERT INTO {ArchivedOrder._meta.db_table}
+                    (id, table_number, status, created_at, updated_at, total_price, archived_at)
+                SELECT id, table_number, status, created_at, updated_at, total_price, %s
+                FROM {order_table} WHERE id = ANY(%s)
+                ''',
+                [timezone.now(), ids]
+            )
+            cursor.execute(
+                f'''
+                INSERT INTO {ArchivedOrderItemRelation._meta.db_table} (id, order_id, item_id, count, title, price)
+                SELECT id, order_id, item_id, count, title, price
+                FROM {relation_table} WHERE order_id = ANY(%s)
+                ''',
+                [ids]
+            )
+        # вместе со ссылками заявок очереди: SET_NULL внешнего ключа в обход Collector не срабатывает
+        delete_order_rows(ids)
+        orders_archived.send(sender=Order, orders=orders)
+    return len(orders)
+
+
+def archive_orders(border: datetime, batch_size: int = ARCHIVE_BATCH_SIZE, pause: float = 0) -> int:
+    '''Функция переноса в архив всех оплаченных заказов старше border короткими транзакциями'''
+    archived = 0
+    while True:
+        count = archive_orders_batch(border, batch_size)
+        archived += count
+        if count < batch_size:
+            return archived
+        if pause:
+            time.sleep(pause)
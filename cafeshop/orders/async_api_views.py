@@ -0,0 +1,176 @@
+import asyncio
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http.request import HttpRequest
+from django.http.response import JsonResponse, StreamingHttpResponse
+
+from cafeshop.db_router import use_replica
+from orders.models import Order
+from .api_views import create_order_api, update_order_api
+from .conditional import aorders_condition
+from .events import get_event_log, wait_events
+from .idempotency import handle_idempotent
+from .funcs import (
+    get_api_queryset, get_serializer_fields, aserialize_orders, get_page_queryset, split_page, search_orders,
+    get_revenue_date_range, filter_date_range, get_include_archived, ORDERS_PAGE_SIZE
+)
+from .rollup import aget_revenue_total
+from .streaming import dumps, get_stream_mode, get_streaming_response, astream_orders, astream_revenue
+
+
+# Асинхронные версии REST API для ASGI: обработчик не занимает поток на время запроса
+
+
+async def aget_orders_json(orders) -> list[dict]:
+    '''Асинхронная версия get_orders_json'''
+    return await aserialize_orders(orders)
+
+
+async def aget_orders_api(request: HttpRequest) -> tuple[dict, int]:
+    '''Функция получения списка заказов'''
+    orders = search_orders(get_api_queryset(), request.GET.get('q'))
+
+    limit = request.GET.get('limit')
+    cursor = request.GET.get('cursor')
+    try:
+        fields, include_items = get_serializer_fields(request.GET)
+        if limit is None and cursor is None:
+            return await aserialize_orders(orders, fields, include_items), 200
+        limit = int(limit or ORDERS_PAGE_SIZE)
+        page = [
+            order async for order in get_page_queryset(
+                orders.prefetch_related(None), limit, cursor
+            ).only('id', 'created_at')
+        ]
+        page, next_cursor = split_page(page, limit)
+        data = {
+            'results': await aserialize_orders(
+                orders.filter(id__in=[order.id for order in page]), fields, include_items
+            ),
+            'next': next_cursor
+        }
+        status = 200
+    except Exception as e:
+        data = {'error': str(e)}
+        status = 400
+    return data, status
+
+
+async def adelete_order_api(pk: int) -> tuple[dict, int]:
+    '''Функция удаления заказа'''
+    try:
+        order = await Order.objects.aget(id=pk)
+        await order.adelete()
+        data = {'msg': 'Order was deleted'}
+        status = 204
+    except Exception as e:
+        status = 400
+        data = {'error': str(e)}
+    return data, status
+
+
+async def aupdate_order_api(request: HttpRequest, pk: int) -> tuple[dict, int]:
+    '''Функция обновления статуса заказа'''
+    # Асинхронной версии нет: условный UPDATE идёт сырым курсором, а витрина выручки, журнал
+    # событий и время изменений обновляются в той же транзакции, что доступно только в
+    # синхронном коде. Запрос выполняется в потоке sync_to_async, цикл событий не блокируется
+    return await sync_to_async(update_order_api)(request, pk)
+
+
+# API получения списка заказов и создания нового
+@use_replica
+@aorders_condition
+async def orders_list_rest_api(request: HttpRequest) -> JsonResponse:
+    '''View для обработки POST и GET запроса по одному адресу'''
+    data = {}
+    if request.method == 'POST':
+        # создание идёт в одной транзакции, а транзакции доступны только в синхронном коде
+        data, status = await sync_to_async(handle_idempotent)(request, create_order_api)
+    elif request.method == 'GET':
+        mode = get_stream_mode(request)
+        if mode:
+            orders = search_orders(get_api_queryset(), request.GET.get('q'))
+            return get_streaming_response(astream_orders(orders, mode), mode)
+        data, status = await aget_orders_api(request)
+    else:
+        status = 405
+        data = {'msg': 'method not allowed'}
+    return JsonResponse(data=data, status=status, safe=False)
+
+
+# функция апдейта и удаления заказа
+async def order_update_delete_api(request: HttpRequest, pk: int) -> JsonResponse:
+    '''View для обработки PUT и DELETE запроса по одному адресу'''
+    if request.method == 'DELETE':
+        data, status = await adelete_order_api(pk)
+    elif request.method == 'PUT':
+        data, status = await aupdate_order_api(request, pk)
+    else:
+        status = 405
+        data = {'msg': 'method not allowed'}
+    return JsonResponse(data=data, status=status, safe=False)
+
+
+# получение выручки
+@use_replica
+@aorders_condition
+async def get_revenue(request: HttpRequest) -> JsonResponse:
+    '''Функция для получения информации о выручке и списком оплаченных заказов'''
+    if request.method != 'GET':
+        status = 405
+        data = {'msg': 'method not allowed'}
+        return JsonResponse(data=data, status=status, safe=False)
+    try:
+        date_from, date_to = get_revenue_date_range(request.GET)
+    except Exception as e:
+        return JsonResponse(data={'error': str(e)}, status=400, safe=False)
+    orders = filter_date_range(get_api_queryset().filter(status='Готово'), date_from, date_to)
+    aget_total = partial(aget_revenue_total, 'Готово', date_from, date_to, get_include_archived(request.GET))
+    mode = get_stream_mode(request)
+    if mode:
+        return get_streaming_response(astream_revenue(orders, mode, aget_total), mode)
+    data = {
+        'total': await aget_total(),
+        'orders': await aget_orders_json(orders)
+    }
+    return JsonResponse(data=data, status=200, safe=False)
+
+
+async def astream_order_events(last_id: int):
+    '''Асинхронный генератор SSE потока событий заказов с id больше last_id'''
+    log = get_event_log()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.ORDER_EVENTS_STREAM_TIMEOUT
+    yield f'retry: {int(settings.ORDER_EVENTS_POLL_INTERVAL * 1000)}\n\n'
+    while True:
+        timeout = min(settings.ORDER_EVENTS_HEARTBEAT, deadline - loop.time())
+        if timeout <= 0:
+            # клиент переподключится с Last-Event-ID и продолжит с того же места
+            return
+        events = await wait_events(log, last_id, timeout)
+        if not events:
+            yield ': keep-alive\n\n'
+        for event in events:
+            last_id = event.id
+            yield f'id: {event.id}\nevent: {event.kind}\ndata: {dumps(event.payload)}\n\n'
+
+
+# поток событий заказов для экранов кухни и официантов. Только асинхронный: под ASGI
+# ожидание событий не занимает поток, а синхронный генератор Django буферизовал бы целиком
+async def order_events_api(request: HttpRequest) -> StreamingHttpResponse | JsonResponse:
+    '''View потока событий заказов (Server-Sent Events) с продолжением по Last-Event-ID'''
+    if request.method != 'GET':
+        status = 405
+        data = {'msg': 'method not allowed'}
+        return JsonResponse(data=data, status=status, safe=False)
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_id = int(last_event_id) if last_event_id else await get_event_log().alast_id()
+    except ValueError:
+        return JsonResponse(data={'error': 'Некорректный Last-Event-ID.'}, status=400, safe=False)
+    response = StreamingHttpResponse(astream_order_events(last_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
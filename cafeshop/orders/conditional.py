@@ -0,0 +1,114 @@
+import hashlib
+from functools import wraps
+
+from django.db import connection
+from django.db.models import Count, Max, Subquery
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.http.request import HttpRequest
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import condition
+
+from items.catalog import get_catalog_version_subquery
+from .models import Order, OrdersDeletedAt
+from .signals import orders_deleted, orders_archived
+from .streaming import get_stream_mode
+
+
+ORDERS_DELETED_AT_ID = 1
+
+
+# Удаление и перенос в архив не меняют max(updated_at), поэтому их время хранится
+# отдельной строкой в БД (общей для всех процессов) в той же транзакции
+@receiver([post_delete, orders_deleted, orders_archived], sender=Order)
+def remember_orders_deleted(sender, **kwargs):
+    table = connection.ops.quote_name(OrdersDeletedAt._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            INSERT INTO {table} (id, deleted_at) VALUES (%s, %s)
+            ON CONFLICT (id) DO UPDATE SET deleted_at = GREATEST({table}.deleted_at, EXCLUDED.deleted_at)
+            ''',
+            [ORDERS_DELETED_AT_ID, timezone.now()]
+        )
+
+
+# Состояние заказов, время удаления и версия каталога читаются одним запросом;
+# Max над подзапросом нужен только потому, что aggregate() принимает одни агрегаты
+ORDERS_STATE_AGGREGATES = {
+    'updated_at': Max('updated_at'),
+    'count': Count('id'),
+    'deleted_at': Max(Subquery(OrdersDeletedAt.objects.filter(pk=ORDERS_DELETED_AT_ID).values('deleted_at')[:1])),
+    'catalog_version': Max(get_catalog_version_subquery()),
+}
+
+
+def merge_deleted_at(state: dict) -> dict:
+    deleted_at = state.pop('deleted_at')
+    if deleted_at and (state['updated_at'] is None or deleted_at > state['updated_at']):
+        state['updated_at'] = deleted_at
+    return state
+
+
+def get_orders_state(request: HttpRequest) -> dict:
+    '''Функция получения состояния таблицы заказов (один лёгкий запрос на запрос клиента)'''
+    if not hasattr(request, '_orders_state'):
+        state = Order.objects.aggregate(**ORDERS_STATE_AGGREGATES)
+        request._orders_state = merge_deleted_at(state)
+    return request._orders_state
+
+
+async def aload_orders_state(request: HttpRequest):
+    '''Асинхронная загрузка состояния таблицы заказов до проверки условий'''
+    if not hasattr(request, '_orders_state'):
+        state = await Order.objects.aaggregate(**ORDERS_STATE_AGGREGATES)
+        request._orders_state = merge_deleted_at(state)
+
+
+def get_orders_etag(request: HttpRequest, *args, **kwargs) -> str:
+    state = get_orders_state(request)
+    raw = ':'.join(str(value) for value in (
+        state['updated_at'], state['count'], state['catalog_version'],
+        get_stream_mode(request), request.get_full_path()
+    ))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def get_orders_last_modified(request: HttpRequest, *args, **kwargs):
+    return get_orders_state(request)['updated_at']
+
+
+# Условный GET: на If-None-Match/If-Modified-Since отвечаем 304 до построения списка заказов
+def orders_condition(view):
+    '''Декоратор условной обработки GET запросов к спискам заказов'''
+    conditional_view = condition(
+        etag_func=get_orders_etag, last_modified_func=get_orders_last_modified
+    )(view)
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            response = conditional_view(request, *args, **kwargs)
+            patch_vary_headers(response, ['Accept'])
+            return response
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def aorders_condition(view):
+    '''Асинхронная версия orders_condition: состояние заказов загружается через async ORM,
+    чтобы condition не обращался к БД синхронно из event loop'''
+    conditional_view = condition(
+        etag_func=get_orders_etag, last_modified_func=get_orders_last_modified
+    )(view)
+
+    @wraps(view)
+    async def wrapper(request: HttpRequest, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            await aload_orders_state(request)
+            response = await conditional_view(request, *args, **kwargs)
+            patch_vary_headers(response, ['Accept'])
+            return response
+        return await view(request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,178 @@
+import asyncio
+import threading
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, DateTimeField, ExpressionWrapper, Func, Max, Min, Q
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Order, OrderEvent
+from .signals import orders_created, orders_status_changed, orders_deleted
+
+
+@dataclass
+class Event:
+    id: int
+    kind: str
+    order_id: int
+    payload: dict
+
+
+class ClockTimestamp(Func):
+    # в отличие от now() не замирает на время транзакции
+    function = 'clock_timestamp'
+    template = '%(function)s()'
+    output_field = DateTimeField()
+
+
+# Ожидание новых событий без блокировки потока: опрос журнала через asyncio.sleep
+async def wait_events(log, last_id: int, timeout: float) -> list[Event]:
+    '''Функция ожидания событий журнала с id больше last_id не дольше timeout секунд'''
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        events = await log.aread(last_id)
+        if events or loop.time() >= deadline:
+            return events
+        await asyncio.sleep(min(settings.ORDER_EVENTS_POLL_INTERVAL, max(deadline - loop.time(), 0)))
+
+
+# Журнал событий в таблице OrderEvent; читатели опрашивают его по id.
+# id выдаётся последовательностью до коммита, поэтому строка с большим id может стать видна
+# раньше строки с меньшим. Чтобы читатель не перескочил её, свежие строки (моложе
+# ORDER_EVENTS_COMMIT_LAG по часам БД) и всё после первой из них отдаются на следующем опросе
+class DatabaseEventLog:
+    def publish(self, events: list[tuple[str, int, dict]]):
+        OrderEvent.objects.bulk_create([
+            OrderEvent(kind=kind, order_id=order_id, payload=payload) for kind, order_id, payload in events
+        ])
+
+    def get_settled_condition(self) -> Q:
+        return Q(created_at__lte=ClockTimestamp() - timedelta(seconds=settings.ORDER_EVENTS_COMMIT_LAG))
+
+    def get_last_id_aggregates(self) -> dict:
+        return {'first_fresh': Min('id', filter=~self.get_settled_condition()), 'last': Max('id')}
+
+    def get_last_id(self, state: dict) -> int:
+        # новый клиент начинает перед первой свежей строкой, чтобы не пропустить её коммит
+        if state['first_fresh'] is not None:
+            return state['first_fresh'] - 1
+        return state['last'] or 0
+
+    def get_read_queryset(self, last_id: int):
+        settled = ExpressionWrapper(self.get_settled_condition(), output_field=BooleanField())
+        return OrderEvent.objects.filter(id__gt=last_id).annotate(settled=settled).order_by('id')[:500]
+
+    def get_settled_events(self, rows) -> list[Event]:
+        events = []
+        for row in rows:
+            if not row.settled:
+                break
+            events.append(Event(row.id, row.kind, row.order_id, row.payload))
+        return events
+
+    def last_id(self) -> int:
+        return self.get_last_id(OrderEvent.objects.aggregate(**self.get_last_id_aggregates()))
+
+    async def alast_id(self) -> int:
+        return self.get_last_id(await OrderEvent.objects.aaggregate(**self.get_last_id_aggregates()))
+
+    def read(self, last_id: int) -> list[Event]:
+        return self.get_settled_events(self.get_read_queryset(last_id))
+
+    async def aread(self, last_id: int) -> list[Event]:
+        return self.get_settled_events([row async for row in self.get_read_queryset(last_id)])
+
+
+# Журнал событий в памяти процесса (тесты и запуск в одном процессе).
+# id выдаются после коммита под блокировкой, поэтому пропусков здесь не бывает
+class MemoryEventLog:
+    max_events = 10000
+
+    def __init__(self):
+        self.events = []
+        self.next_id = 1
+        self.lock = threading.Lock()
+
+    def publish(self, events: list[tuple[str, int, dict]]):
+        with self.lock:
+            for kind, order_id, payload in events:
+                self.events.append(Event(self.next_id, kind, order_id, payload))
+                self.next_id += 1
+            del self.events[:-self.max_events]
+
+    def last_id(self) -> int:
+        with self.lock:
+            return self.next_id - 1
+
+    async def alast_id(self) -> int:
+        return self.last_id()
+
+    def read(self, last_id: int) -> list[Event]:
+        with self.lock:
+            return [event for event in self.events if event.id > last_id]
+
+    async def aread(self, last_id: int) -> list[Event]:
+        return self.read(last_id)
+
+
+EVENT_LOG_BACKENDS = {
+    'database': DatabaseEventLog,
+    'memory': MemoryEventLog,
+}
+_event_logs = {}
+
+
+def get_event_log() -> DatabaseEventLog | MemoryEventLog:
+    '''Функция получения журнала событий, выбранного в ORDER_EVENTS_BACKEND'''
+    backend = settings.ORDER_EVENTS_BACKEND
+    if backend not in _event_logs:
+        _event_logs[backend] = EVENT_LOG_BACKENDS[backend]()
+    return _event_logs[backend]
+
+
+def get_order_payload(order: Order) -> dict:
+    return {
+        'id': order.id,
+        'table_number': order.table_number,
+        'status': order.status,
+        'total_price': order.total_price,
+    }
+
+
+def publish(events: list[tuple[str, int, dict]]):
+    '''Функция публикации событий после коммита транзакции с изменением'''
+    log = get_event_log()
+    transaction.on_commit(lambda: log.publish(events))
+
+
+@receiver(orders_created, sender=Order)
+def publish_orders_created(sender, orders, **kwargs):
+    publish([
+        (OrderEvent.Kind.CREATED, order.id, get_order_payload(order)) for order in orders
+    ])
+
+
+@receiver(orders_status_changed, sender=Order)
+def publish_orders_status_changed(sender, changes, **kwargs):
+    publish([
+        (OrderEvent.Kind.STATUS_CHANGED, order.id, {**get_order_payload(order), 'old_status': old_status})
+        for order, old_status in changes
+    ])
+
+
+def get_deleted_event(order: Order) -> tuple[str, int, dict]:
+    return OrderEvent.Kind.DELETED, order.id, {'id': order.id, 'table_number': order.table_number}
+
+
+@receiver(post_delete, sender=Order)
+def publish_order_deleted(sender, instance, **kwargs):
+    publish([get_deleted_event(instance)])
+
+
+@receiver(orders_deleted, sender=Order)
+def publish_orders_deleted(sender, orders, **kwargs):
+    publish([get_deleted_event(order) for order in orders])
@@ -0,0 +1,58 @@
+import csv
+from datetime import datetime
+
+from .models import OrderItemRelation, ArchivedOrderItemRelation
+
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_HEADER = (
+    'order_id', 'created_at', 'table_number', 'status',
+    'item_id', 'title', 'price', 'count', 'line_total', 'order_total'
+)
+
+
+# Буфер для csv.writer, который сразу возвращает записанную строку
+class Echo:
+    def write(self, value: str) -> str:
+        return value
+
+
+def get_export_lines(model, date_from: datetime | None, date_to: datetime | None, status: str | None):
+    '''Функция получения позиций заказов (текущих или архивных) для выгрузки'''
+    lines = model.objects.all()
+    if date_from:
+        lines = lines.filter(order__created_at__gte=date_from)
+    if date_to:
+        lines = lines.filter(order__created_at__lt=date_to)
+    if status:
+        lines = lines.filter(order__status=status)
+    return lines.values_list(
+        'order_id', 'order__created_at', 'order__table_number', 'order__status',
+        'item_id', 'title', 'price', 'count', 'order__total_price', 'id'
+    )
+
+
+# Архивные позиции добавляются через UNION ALL: заказ лежит либо в рабочих таблицах,
+# либо в архиве, поэтому строки не повторяются, а сортировка остаётся общей
+def get_export_rows(date_from: datetime | None = None, date_to: datetime | None = None, status: str | None = None,
+                    include_archived: bool = False):
+    '''Генератор строк выгрузки: одна строка на позицию заказа, чтение серверным курсором пачками'''
+    lines = get_export_lines(OrderItemRelation, date_from, date_to, status)
+    if include_archived:
+        lines = lines.union(get_export_lines(ArchivedOrderItemRelation, date_from, date_to, status), all=True)
+    lines = lines.order_by('order__created_at', 'order_id', 'id')
+    for order_id, created_at, table_number, status, item_id, title, price, count, total, _ in lines.iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    ):
+        yield (
+            order_id, created_at.isoformat(), table_number, status,
+            item_id, title, price, count, price * count, total
+        )
+
+
+def iter_csv(rows):
+    '''Генератор строк CSV с заголовком'''
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for row in rows:
+        yield writer.writerow(row)
@@ -1,12 +1,38 @@
-from django.forms import ModelForm, ModelChoiceField, IntegerField, Form, NumberInput
+from django.forms import ModelForm, ChoiceField, IntegerField, Form, HiddenInput, ValidationError
 
-from .models import Order, OrderItemRelation
-from items.models import Item
+from .models import Order
+from items.catalog import get_catalog
+
+
+# Поле выбора товара: варианты берутся из кэша каталога, а не запросом на каждую строку формсета
+class CatalogItemField(ChoiceField):
+    default_error_messages = {
+        'invalid_choice': 'Выберите корректный вариант. Вашего варианта нет среди допустимых значений.',
+    }
+
+    def __init__(self, **kwargs):
+        super().__init__(choices=self.get_catalog_choices, **kwargs)
+
+    @staticmethod
+    def get_catalog_choices():
+        return [('', '---------')] + [(item.id, str(item)) for item in get_catalog().values()]
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return get_catalog()[int(value)]
+        except (KeyError, ValueError, TypeError):
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+
+    def validate(self, value):
+        if value is None and self.required:
+            raise ValidationError(self.error_messages['required'], code='required')
 
 
 # Форма для добавления товаров в заказ
 class OrderItemForm(Form):
-    item = ModelChoiceField(queryset=Item.objects.all(), required=True)
+    item = CatalogItemField(required=True)
     count = IntegerField(min_value=1, max_value=255, required=True)
 
 
@@ -15,8 +41,19 @@ class OrderModelForm(Form):
     table_number = IntegerField(max_value=100, min_value=1, required=True)
 
 
-# форма смены статуса
+# форма смены статуса: версия заказа на момент открытия формы и только разрешённые переходы
 class OrderUpdateForm(ModelForm):
+    version = IntegerField(widget=HiddenInput, required=False)
+
     class Meta:
         model = Order
         fields = ['status']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.initial.setdefault('version', self.instance.version)
+        current = Order.StatusType(self.instance.status)
+        allowed = {current, *current.targets}
+        self.fields['status'].choices = [
+            (value, label) for value, label in self.fields['status'].choices if value in allowed
+        ]
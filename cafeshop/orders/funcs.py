@@ -1,58 +1,455 @@
-from django.db.models import Sum, F, QuerySet
+import base64
+from datetime import datetime
+from collections.abc import Iterable
 
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.db.models import Q, QuerySet
+from django.contrib.postgres.search import SearchQuery
+
+from items.catalog import get_catalog_items
 from items.models import Item
-from orders.models import Order
+from orders.models import Order, OrderItemRelation, OrderTicket, SEARCH_CONFIG
+from .rollup import floor_hour
+from .signals import orders_created, orders_status_changed, orders_deleted
 
 
 # Создание queryset для дальнейшей обработки
 def get_api_queryset():
-    '''Функция получения Queryset`a с аннотацией'''
+    '''Функция получения Queryset`a заказов с позициями'''
     orders = Order.objects.all().prefetch_related(
             'orders'
-        ).prefetch_related(
-            'orders__item'
-        ).annotate(
-            total_price=Sum(F('orders__item__price') * F('orders__count'))
         ).order_by(
-            '-created_at'
+            '-created_at', '-id'
         )
     return orders
 
 
+ORDERS_PAGE_SIZE = 50
+ORDERS_MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(order: Order) -> str:
+    '''Функция кодирования курсора по паре (created_at, id) заказа'''
+    raw = f'{order.created_at.isoformat()}|{order.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    '''Функция декодирования курсора в пару (created_at, id)'''
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, pk = raw.split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except ValueError:
+        raise Exception('Некорректный cursor.')
+
+
+# Курсорная (keyset) пагинация: цена страницы не зависит от размера истории
+def paginate_orders(orders: QuerySet, limit: int, cursor: str | None = None) -> tuple[QuerySet, str | None]:
+    '''Функция получения queryset страницы заказов и курсора следующей страницы'''
+    page = list(get_page_queryset(orders.prefetch_related(None), limit, cursor).only('id', 'created_at'))
+    page, next_cursor = split_page(page, limit)
+    return orders.filter(id__in=[order.id for order in page]), next_cursor
+
+
+def get_page_queryset(orders: QuerySet, limit: int, cursor: str | None = None) -> QuerySet:
+    '''Функция получения queryset страницы (на одну запись больше limit)'''
+    if limit < 1 or limit > ORDERS_MAX_PAGE_SIZE:
+        raise Exception(f'limit должен быть от 1 до {ORDERS_MAX_PAGE_SIZE}.')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        orders = orders.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+    return orders.order_by('-created_at', '-id')[:limit + 1]
+
+
+def split_page(page: list[Order], limit: int):
+    '''Функция отделения лишней записи страницы и получения курсора следующей'''
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1])
+    return page, next_cursor
+
+
+ORDER_FIELDS = ('id', 'status', 'table_number', 'total_price')
+# порядок ключей в JSON заказа
+ORDER_JSON_KEYS = ('id', 'status', 'table_number', 'items', 'total_price')
+ORDER_ITEM_COLUMNS = ('orders__item_id', 'orders__title', 'orders__price', 'orders__count')
+
+
+def get_serializer_fields(params) -> tuple[tuple[str, ...], bool]:
+    '''Функция получения полей заказа и признака вложенных позиций из параметров fields и include'''
+    fields = params.get('fields')
+    if not fields:
+        return ORDER_FIELDS, True
+    fields = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = set(fields) - set(ORDER_FIELDS) - {'items'}
+    if unknown:
+        raise Exception(f'Неизвестные поля: {", ".join(sorted(unknown))}. Доступные поля: {ORDER_FIELDS + ("items", )}')
+    include_items = 'items' in fields or 'items' in params.get('include', '').split(',')
+    return tuple(field for field in ORDER_FIELDS if field in fields), include_items
+
+
+def get_order_rows_queryset(orders: QuerySet, fields: tuple[str, ...], include_items: bool) -> QuerySet:
+    '''Функция получения плоского запроса строк заказов (с позициями - одна строка на позицию)'''
+    columns = ('id', ) + tuple(field for field in fields if field != 'id')
+    if include_items:
+        columns += ORDER_ITEM_COLUMNS
+        orders = orders.order_by(*orders.query.order_by, 'orders__id')
+    return orders.prefetch_related(None).values_list(*columns)
+
+
+def group_order_rows(rows: Iterable[tuple], fields: tuple[str, ...], include_items: bool) -> list[dict]:
+    '''Функция сборки JSON объектов заказов из плоских строк за один проход'''
+    columns = ('id', ) + tuple(field for field in fields if field != 'id')
+    keys = [key for key in ORDER_JSON_KEYS if key in fields or (key == 'items' and include_items)]
+    orders = {}
+    for row in rows:
+        order = orders.get(row[0])
+        if order is None:
+            values = dict(zip(columns, row), items=[])
+            order = orders[row[0]] = {key: values[key] for key in keys}
+        if include_items and row[len(columns)] is not None:
+            item_id, title, price, count = row[len(columns):]
+            order['items'].append({'id': item_id, 'title': title, 'price': price, 'count': count})
+    return list(orders.values())
+
+
+# Сериализация без создания моделей: один запрос values_list вместо заказов и prefetch позиций
+def serialize_orders(orders: QuerySet, fields: tuple[str, ...] = ORDER_FIELDS, include_items: bool = True) -> list[dict]:
+    '''Функция получения JSON объектов заказов из queryset'''
+    return group_order_rows(get_order_rows_queryset(orders, fields, include_items), fields, include_items)
+
+
+async def aserialize_orders(orders: QuerySet, fields: tuple[str, ...] = ORDER_FIELDS,
+                            include_items: bool = True) -> list[dict]:
+    '''Асинхронная версия serialize_orders'''
+    rows = [row async for row in get_order_rows_queryset(orders, fields, include_items)]
+    return group_order_rows(rows, fields, include_items)
+
+
 # Получение JSON из queryset
 def get_orders_json(orders: QuerySet):
     '''Функция получения JSON объекта со списком заказов'''
-    data = [
-        {
-            'id': order.id,
-            'status': order.status,
-            'table_number': order.table_number,
-            'items': [
-                {
-                    'id': rel.item.id,
-                    'title': rel.item.title,
-                    'price': rel.item.price,
-                    'count': rel.count
-                } for rel in order.orders.all()
-            ],
-            'total_price': order.total_price
-        } for order in orders
-    ]
-    return data
-
-
-def find_items_in_order(items: list[dict]):
+    return serialize_orders(orders)
+
+
+# Поочерёдная сериализация заказов (используется и для потоковой отдачи)
+def iter_orders_json(orders: Iterable[Order]):
+    '''Генератор JSON объектов заказов'''
+    for order in orders:
+        yield get_order_json(order)
+
+
+def get_order_json(order: Order) -> dict:
+    '''Функция получения JSON объекта заказа'''
+    return {
+        'id': order.id,
+        'status': order.status,
+        'table_number': order.table_number,
+        'items': [
+            {
+                'id': rel.item_id,
+                'title': rel.title,
+                'price': rel.price,
+                'count': rel.count
+            } for rel in order.orders.all()
+        ],
+        'total_price': order.total_price
+    }
+
+
+def parse_datetime_param(value: str) -> datetime:
+    '''Функция разбора даты или даты со временем из параметра запроса'''
+    parsed = parse_datetime(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is None:
+            raise Exception(f'Некорректная дата: {value}.')
+        parsed = datetime(date.year, date.month, date.day)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def get_date_range(params) -> tuple[datetime | None, datetime | None]:
+    '''Функция получения периода [from, to) из параметров запроса'''
+    date_from = params.get('from')
+    date_to = params.get('to')
+    date_from = parse_datetime_param(date_from) if date_from else None
+    date_to = parse_datetime_param(date_to) if date_to else None
+    return date_from, date_to
+
+
+# Выручка считается по часовой витрине, поэтому список заказов рядом с ней
+# берётся за тот же период с границами, округлёнными вниз до часа
+def get_revenue_date_range(params) -> tuple[datetime | None, datetime | None]:
+    '''Функция получения периода выручки [from, to) с точностью до часа'''
+    date_from, date_to = get_date_range(params)
+    return floor_hour(date_from) if date_from else None, floor_hour(date_to) if date_to else None
+
+
+def get_include_archived(params) -> bool:
+    '''Функция проверки параметра archived: учитывать ли архивные заказы в выручке'''
+    return params.get('archived') in ('1', 'true')
+
+
+def validate_status_filter(status: str | None) -> str | None:
+    '''Функция проверки статуса из параметров фильтрации'''
+    values = Order.StatusType.values
+    if status and status not in values:
+        raise Exception(f'Неизвестный статус. Выберите статус из списка: {values}')
+    return status or None
+
+
+def filter_date_range(orders: QuerySet, date_from: datetime | None, date_to: datetime | None) -> QuerySet:
+    '''Функция фильтрации заказов по периоду создания'''
+    if date_from:
+        orders = orders.filter(created_at__gte=date_from)
+    if date_to:
+        orders = orders.filter(created_at__lt=date_to)
+    return orders
+
+
+# Поиск по полям table_number и status: числа и названия статусов идут в обычные индексы,
+# полнотекстовый поиск по сохранённому вектору - только для остальных запросов
+def search_orders(orders: QuerySet, search_query: str | None) -> QuerySet:
+    '''Функция фильтрации заказов по поисковому запросу'''
+    if not search_query or not search_query.strip():
+        return orders
+    query = search_query.strip()
+    if query.isdigit() and len(query) < 10:
+        return orders.filter(table_number=int(query))
+    status = find_status(query)
+    if status:
+        return orders.filter(status=status)
+    return orders.filter(search_vector=SearchQuery(query, config=SEARCH_CONFIG))
+
+
+def find_status(query: str) -> str | None:
+    '''Функция поиска статуса заказа по названию'''
+    query = query.casefold()
+    for value, label in Order.StatusType.choices:
+        if query in (value.casefold(), label.casefold()):
+            return value
+    return None
+
+
+ORDER_MAX_ITEMS = 10
+ORDERS_MAX_BATCH_SIZE = 500
+
+
+def validate_order_data(order_data: dict) -> tuple[int, list[dict]]:
+    '''Функция проверки данных заказа из тела запроса'''
+    items = order_data.get('items')
+    table_number = order_data.get('table_number')
+    if table_number < 1:
+        raise Exception('table_number не может быть меньше 1.')
+    if len(items) == 0 or len(items) > ORDER_MAX_ITEMS:
+        raise Exception(f'items не может быть пустым и иметь размер больше {ORDER_MAX_ITEMS}.')
+    return table_number, items
+
+
+def get_items_catalog(orders_items: Iterable[list[dict]]) -> dict[int, Item]:
+    '''Функция получения всех товаров заказов из кэша каталога'''
+    item_ids = {int(item.get('id')) for items in orders_items for item in items if item.get('id')}
+    return get_catalog_items(item_ids)
+
+
+def find_items_in_order(items: list[dict], catalog: dict[int, Item] | None = None):
     '''Функция нахождения товаров и общей суммы заказа'''
+    if catalog is None:
+        catalog = get_items_catalog([items])
     items_obj = []
     total_price = 0
     for item in items:
         item_id = item.get('id')
         item_count = int(item.get('count'))
         if item_id and item_count and item_count > 0:
-            item = Item.objects.get(id=item_id)
+            item = catalog.get(int(item_id))
+            if item is None:
+                raise Exception(f'Товар с id {item_id} не найден.')
             items_obj.append([item, item_count])
             total_price += item_count * item.price
         else:
             raise Exception(f'Некорректные данные item. id: {item_id}, count: {item_count};')
         
-    return items_obj, total_price
\ No newline at end of file
+    return items_obj, total_price
+
+
+# Сохранение заказов: один INSERT на заказы и один на позиции в одной транзакции
+def save_orders(orders_items: list[tuple[int, list[list]]]) -> list[tuple[Order, list[OrderItemRelation]]]:
+    '''Функция пакетного сохранения заказов вместе с позициями'''
+    with transaction.atomic():
+        orders = Order.objects.bulk_create([
+            Order(
+                table_number=table_number,
+                total_price=sum(item.price * item_count for item, item_count in items_obj)
+            ) for table_number, items_obj in orders_items
+        ])
+        created = []
+        relations = []
+        for order, (_, items_obj) in zip(orders, orders_items):
+            order_items = [
+                OrderItemRelation(
+                    order=order, item=item, count=item_count, title=item.title, price=item.price
+                ) for item, item_count in items_obj
+            ]
+            created.append((order, order_items))
+            relations.extend(order_items)
+        OrderItemRelation.objects.bulk_create(relations)
+        orders_created.send(sender=Order, orders=orders)
+    return created
+
+
+def create_orders(orders_data: list[dict]) -> list[dict]:
+    '''Функция создания заказов из тела запроса, возвращает JSON созданных заказов'''
+    validated = [validate_order_data(order_data) for order_data in orders_data]
+    catalog = get_items_catalog(items for _, items in validated)
+    orders_items = []
+    for table_number, items in validated:
+        items_obj, _ = find_items_in_order(items, catalog)
+        orders_items.append((table_number, items_obj))
+    created = save_orders(orders_items)
+    return [get_created_order_json(order, order_items) for order, order_items in created]
+
+
+def get_created_order_json(order: Order, order_items: list[OrderItemRelation]) -> dict:
+    '''Функция получения JSON объекта созданного заказа'''
+    return {
+        'id': order.id,
+        'status': order.status,
+        'table_number': order.table_number,
+        'items': [
+            {
+                'id': rel.item_id,
+                'title': rel.title,
+                'price': rel.price
+            } for rel in order_items
+        ],
+        'total_price': order.total_price
+    }
+
+
+def validate_order_ids(ids) -> list[int]:
+    '''Функция проверки списка id заказов из тела запроса'''
+    if not isinstance(ids, list) or len(ids) == 0:
+        raise Exception('ids должен быть непустым массивом.')
+    if len(ids) > ORDERS_MAX_BATCH_SIZE:
+        raise Exception(f'Нельзя изменить больше {ORDERS_MAX_BATCH_SIZE} заказов за раз.')
+    if not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+        raise Exception('ids должен содержать целые числа.')
+    return list(dict.fromkeys(ids))
+
+
+def lock_orders(ids: list[int]) -> list[Order]:
+    '''Функция блокировки заказов в порядке id (единый порядок исключает взаимные блокировки)'''
+    return list(
+        Order.objects.select_for_update().filter(id__in=ids).order_by('id').only(
+            'id', 'table_number', 'status', 'created_at', 'total_price'
+        )
+    )
+
+
+# Удаление заказов в обход Collector: по одному DELETE на таблицу. on_delete связей
+# здесь не срабатывает, поэтому ссылки заявок очереди обнуляются явно (SET_NULL)
+def delete_order_rows(ids: list[int]):
+    '''Функция удаления строк заказов и их позиций по id'''
+    with connection.cursor() as cursor:
+        cursor.execute(f'UPDATE {OrderTicket._meta.db_table} SET order_id = NULL WHERE order_id = ANY(%s)', [ids])
+        cursor.execute(f'DELETE FROM {OrderItemRelation._meta.db_table} WHERE order_id = ANY(%s)', [ids])
+        cursor.execute(f'DELETE FROM {Order._meta.db_table} WHERE id = ANY(%s)', [ids])
+
+
+def get_missing_ids(ids: list[int], found: list[int]) -> list[int]:
+    found = set(found)
+    return [pk for pk in ids if pk not in found]
+
+
+# Смена статуса без блокировок строк: один условный UPDATE. Подзапрос даёт снимок строки
+# с прежним статусом; если заказ успели изменить, его version уже другая и UPDATE его пропускает
+ORDER_STATUS_UPDATE_SQL = '''
+    UPDATE {table} AS o SET status = %s, version = o.version + 1, updated_at = %s
+    FROM (SELECT id, status, version FROM {table} WHERE id = ANY(%s)) AS old
+    WHERE o.id = old.id AND o.version = old.version AND old.status = ANY(%s){version_filter}
+    RETURNING old.status, {columns}
+'''
+
+
+def change_orders_status(ids: list[int], status: str, version: int | None = None) -> list[Order]:
+    '''Функция смены статуса заказов по таблице переходов, возвращает изменённые заказы'''
+    status = Order.StatusType(status)
+    fields = Order._meta.concrete_fields
+    sql = ORDER_STATUS_UPDATE_SQL.format(
+        table=connection.ops.quote_name(Order._meta.db_table),
+        version_filter='' if version is None else ' AND o.version = %s',
+        columns=', '.join(f'o.{connection.ops.quote_name(field.column)}' for field in fields),
+    )
+    params = [status.value, timezone.now(), ids, status.sources]
+    if version is not None:
+        params.append(version)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        changes = [
+            (Order.from_db(connection.alias, [field.attname for field in fields], values), old_status)
+            for old_status, *values in rows
+        ]
+        if changes:
+            orders_status_changed.send(sender=Order, changes=changes)
+    return [order for order, _ in changes]
+
+
+def change_order_status(pk: int, status: str, version: int | None = None) -> Order | None:
+    '''Функция смены статуса заказа, None - заказа нет, переход запрещён или версия устарела'''
+    orders = change_orders_status([pk], status, version)
+    return orders[0] if orders else None
+
+
+def validate_order_version(version) -> int | None:
+    '''Функция проверки версии заказа из тела запроса'''
+    if version is not None and (not isinstance(version, int) or isinstance(version, bool)):
+        raise Exception('version должен быть целым числом.')
+    return version
+
+
+def get_status_conflict(pk: int, status: str, version: int | None = None) -> tuple[dict, int]:
+    '''Функция получения ответа на несостоявшуюся смену статуса: 404 или 409 с текущим состоянием,
+    200 - заказ уже в этом статусе'''
+    current = Order.objects.filter(id=pk).values('status', 'version').first()
+    if current is None:
+        return {'error': 'Заказ не найден.'}, 404
+    # повторная установка текущего статуса не конфликт (например, повтор запроса после обрыва связи)
+    if current['status'] == status and version in (None, current['version']):
+        return {'msg': 'field update success', 'version': current['version']}, 200
+    if status in Order.StatusType(current['status']).targets:
+        error = 'Заказ был изменён параллельно, повторите запрос с актуальной версией.'
+    else:
+        error = f'Нельзя сменить статус {current["status"]} на {status}.'
+    return {'error': error, **current}, 409
+
+
+# Пакетная смена статуса: один условный UPDATE на все заказы
+def update_orders_status(ids: list[int], status: str) -> tuple[list[int], list[int]]:
+    '''Функция смены статуса заказов, возвращает id изменённых и не изменённых
+    (нет заказа, переход запрещён или заказ изменён параллельно) заказов'''
+    changed = {order.id for order in change_orders_status(ids, status)}
+    return [pk for pk in ids if pk in changed], get_missing_ids(ids, changed)
+
+
+# Пакетное удаление: заказы блокируются одним SELECT, удаляются по одному DELETE на таблицу,
+# витрина выручки, время удаления и журнал событий обновляются одним сигналом на всю пачку
+def delete_orders(ids: list[int]) -> tuple[list[int], list[int]]:
+    '''Функция удаления заказов, возвращает id удалённых и не найденных заказов'''
+    with transaction.atomic():
+        orders = lock_orders(ids)
+        found = [order.id for order in orders]
+        if orders:
+            delete_order_rows(found)
+            orders_deleted.send(sender=Order, orders=orders)
+    return found, get_missing_ids(ids, found)
@@ -0,0 +1,55 @@
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.http.request import HttpRequest
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+def get_request_hash(request: HttpRequest) -> str:
+    return hashlib.sha256(request.path.encode() + b'\n' + request.body).hexdigest()
+
+
+def get_expired_border():
+    return timezone.now() - timedelta(seconds=settings.ORDER_IDEMPOTENCY_KEY_TTL)
+
+
+# Повтор запроса с тем же Idempotency-Key получает сохранённый ответ без повторного создания заказа.
+# Строка ключа вставляется в транзакции создания: параллельный дубль ждёт на уникальном индексе
+# до её коммита и затем читает уже сохранённый ответ
+def handle_idempotent(request: HttpRequest, handler) -> tuple[dict | list, int]:
+    '''Функция выполнения handler(request) не более одного раза на Idempotency-Key'''
+    key = request.headers.get('Idempotency-Key')
+    if not key:
+        return handler(request)
+    if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        return {'error': f'Idempotency-Key не может быть длиннее {IDEMPOTENCY_KEY_MAX_LENGTH} символов.'}, 400
+    request_hash = get_request_hash(request)
+    with transaction.atomic():
+        IdempotencyKey.objects.filter(key=key, created_at__lt=get_expired_border()).delete()
+        record, created = IdempotencyKey.objects.get_or_create(key=key, defaults={'request_hash': request_hash})
+        if not created:
+            if record.request_hash != request_hash:
+                return {'error': 'Idempotency-Key уже использован с другим запросом.'}, 422
+            return record.response_body, record.response_status
+        data, status = handler(request)
+        if status >= 400:
+            # ошибочный запрос ничего не создал, ключ не сохраняется и повтор выполнится заново
+            transaction.set_rollback(True)
+            return data, status
+        record.response_status = status
+        record.response_body = data
+        record.save(update_fields=['response_status', 'response_body'])
+    return data, status
+
+
+def prune_idempotency_keys() -> int:
+    '''Функция удаления ключей идемпотентности старше ORDER_IDEMPOTENCY_KEY_TTL'''
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=get_expired_border()).delete()
+    return deleted
@@ -0,0 +1,61 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .funcs import validate_order_data, get_items_catalog, find_items_in_order, save_orders
+from .models import OrderTicket
+
+
+ORDER_QUEUE_BATCH_SIZE = 200
+
+
+def enqueue_order(order_data: dict) -> OrderTicket:
+    '''Функция проверки заказа и постановки его в очередь на создание'''
+    table_number, items = validate_order_data(order_data)
+    items_obj, _ = find_items_in_order(items)
+    return OrderTicket.objects.create(payload={
+        'table_number': table_number,
+        'items': [{'id': item.id, 'count': item_count} for item, item_count in items_obj],
+    })
+
+
+def get_ticket_json(ticket: OrderTicket) -> dict:
+    '''Функция получения JSON объекта заявки'''
+    return {
+        'ticket': ticket.id,
+        'status': ticket.status,
+        'order_id': ticket.order_id,
+        'error': ticket.error or None,
+    }
+
+
+# Обработка пачки заявок: заказы всех заявок создаются одним save_orders (bulk_create).
+# Заявки, занятые другим воркером, пропускаются, поэтому воркеров может быть несколько
+def process_order_queue_batch(batch_size: int = ORDER_QUEUE_BATCH_SIZE) -> int:
+    '''Функция создания заказов по пачке ожидающих заявок, возвращает количество обработанных'''
+    with transaction.atomic():
+        tickets = list(
+            OrderTicket.objects.select_for_update(skip_locked=True).filter(
+                status=OrderTicket.StatusType.PENDING
+            ).order_by('id')[:batch_size]
+        )
+        if not tickets:
+            return 0
+        catalog = get_items_catalog(ticket.payload['items'] for ticket in tickets)
+        valid = []
+        orders_items = []
+        for ticket in tickets:
+            ticket.processed_at = timezone.now()
+            try:
+                # товар мог быть удалён, пока заявка ждала в очереди
+                items_obj, _ = find_items_in_order(ticket.payload['items'], catalog)
+            except Exception as e:
+                ticket.status = OrderTicket.StatusType.FAILED
+                ticket.error = str(e)
+                continue
+            valid.append(ticket)
+            orders_items.append((ticket.payload['table_number'], items_obj))
+        for ticket, (order, _) in zip(valid, save_orders(orders_items) if orders_items else []):
+            ticket.status = OrderTicket.StatusType.DONE
+            ticket.order = order
+        OrderTicket.objects.bulk_update(tickets, ['status', 'order', 'error', 'processed_at'])
+    return len(tickets)
@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.archive import archive_orders, ARCHIVE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Переносит оплаченные заказы старше указанного срока в архивные таблицы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, required=True, help='возраст заказов в днях')
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help='заказов в одной транзакции')
+        parser.add_argument('--pause', type=float, default=0, help='пауза между пачками в секундах')
+
+    def handle(self, *args, **options):
+        border = timezone.now() - timedelta(days=options['older_than'])
+        archived = archive_orders(border, options['batch_size'], options['pause'])
+        self.stdout.write(f'Перенесено в архив заказов: {archived}')
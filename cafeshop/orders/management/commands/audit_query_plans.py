@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks.seed import seed
+from benchmarks.utils import benchmark_database
+from orders.query_plans import audit_query_plans
+
+
+class Command(BaseCommand):
+    help = ('Проверяет планы запросов эндпоинтов на отдельной наполненной БД '
+            'и завершается с ошибкой при последовательном сканировании больших таблиц')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=20000, help='количество заказов в тестовых данных')
+        parser.add_argument('--threshold', type=int, default=1000, help='допустимый размер таблицы для Seq Scan')
+        parser.add_argument('--keepdb', action='store_true', help='не удалять тестовую БД после проверки')
+
+    def handle(self, *args, **options):
+        with benchmark_database(keepdb=options['keepdb']):
+            seed(orders=options['orders'])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            problems = audit_query_plans(options['threshold'])
+        for name, scans in problems.items():
+            self.stdout.write(f'{name}: Seq Scan ' + ', '.join(f'{table} ({rows})' for table, rows in scans))
+        if problems:
+            raise CommandError(f'Последовательное сканирование в запросах: {", ".join(problems)}')
+        self.stdout.write(self.style.SUCCESS('Планы запросов в порядке'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.export import get_export_rows, iter_csv
+from orders.funcs import get_date_range, validate_status_filter
+
+
+class Command(BaseCommand):
+    help = 'Выгружает позиции заказов в CSV (одна строка на позицию)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='from', help='начало периода (дата или дата со временем)')
+        parser.add_argument('--to', dest='to', help='конец периода, не включительно')
+        parser.add_argument('--status', help='статус заказов')
+        parser.add_argument('--archived', action='store_true', help='добавить заказы из архива')
+        parser.add_argument('--output', help='файл для выгрузки, по умолчанию stdout')
+
+    def handle(self, *args, **options):
+        try:
+            date_from, date_to = get_date_range(options)
+            status = validate_status_filter(options['status'])
+        except Exception as e:
+            raise CommandError(str(e))
+        lines = iter_csv(get_export_rows(date_from, date_to, status, options['archived']))
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as file:
+                file.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
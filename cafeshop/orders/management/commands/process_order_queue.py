@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.ingest import process_order_queue_batch, ORDER_QUEUE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Создаёт заказы по заявкам из очереди пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=ORDER_QUEUE_BATCH_SIZE, help='заявок в одной пачке')
+        parser.add_argument('--sleep', type=float, default=0.2, help='пауза при пустой очереди в секундах')
+        parser.add_argument('--once', action='store_true', help='обработать очередь и завершиться')
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            count = process_order_queue_batch(options['batch_size'])
+            processed += count
+            if count:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
+        self.stdout.write(f'Обработано заявок: {processed}')
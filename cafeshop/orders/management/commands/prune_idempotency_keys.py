@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from orders.idempotency import prune_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = 'Удаляет ключи идемпотентности старше ORDER_IDEMPOTENCY_KEY_TTL'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Удалено ключей: {prune_idempotency_keys()}')
@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.models import OrderEvent
+
+
+class Command(BaseCommand):
+    help = 'Удаляет старые события из журнала изменений заказов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=24, help='возраст событий в часах')
+
+    def handle(self, *args, **options):
+        border = timezone.now() - timedelta(hours=options['older_than'])
+        deleted, _ = OrderEvent.objects.filter(created_at__lt=border).delete()
+        self.stdout.write(f'Удалено событий: {deleted}')
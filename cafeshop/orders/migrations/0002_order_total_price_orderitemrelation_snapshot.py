@@ -0,0 +1,30 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='orderitemrelation',
+            name='price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=6),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='orderitemrelation',
+            name='title',
+            field=models.CharField(default='', max_length=64),
+            preserve_default=False,
+        ),
+    ]
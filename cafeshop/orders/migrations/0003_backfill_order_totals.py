@@ -0,0 +1,36 @@
+from django.db import migrations
+from django.db.models import F, OuterRef, Subquery, Sum, DecimalField
+from django.db.models.functions import Coalesce
+
+
+def backfill_totals(apps, schema_editor):
+    '''Заполнение снимков цен позиций и сумм существующих заказов'''
+    Item = apps.get_model('items', 'Item')
+    Order = apps.get_model('orders', 'Order')
+    OrderItemRelation = apps.get_model('orders', 'OrderItemRelation')
+
+    item = Item.objects.filter(pk=OuterRef('item_id'))
+    OrderItemRelation.objects.update(
+        title=Subquery(item.values('title')[:1]),
+        price=Subquery(item.values('price')[:1]),
+    )
+    totals = OrderItemRelation.objects.filter(
+        order_id=OuterRef('pk')
+    ).values('order_id').annotate(
+        total=Sum(F('price') * F('count'))
+    ).values('total')
+    Order.objects.update(
+        total_price=Coalesce(Subquery(totals), 0, output_field=DecimalField(max_digits=10, decimal_places=2))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0001_initial'),
+        ('orders', '0002_order_total_price_orderitemrelation_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay, TruncHour
+
+
+def backfill_rollup(apps, schema_editor):
+    '''Заполнение витрины выручки по существующим заказам'''
+    Order = apps.get_model('orders', 'Order')
+    RevenueRollup = apps.get_model('orders', 'RevenueRollup')
+
+    RevenueRollup.objects.all().delete()
+    for granularity, trunc in (('hour', TruncHour), ('day', TruncDay)):
+        rows = Order.objects.annotate(
+            bucket=trunc('created_at')
+        ).values('bucket', 'status').annotate(
+            orders_count=Count('id'), total=Sum('total_price')
+        ).order_by()
+        RevenueRollup.objects.bulk_create([
+            RevenueRollup(granularity=granularity, **row) for row in rows
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_revenuerollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
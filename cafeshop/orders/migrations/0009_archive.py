@@ -0,0 +1,58 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_order_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('table_number', models.IntegerField()),
+                ('status', models.CharField(choices=[('В ожидании', 'Pending'), ('Готово', 'Ready'), ('Оплачено', 'Paid')])),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItemRelation',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('item_id', models.BigIntegerField()),
+                ('count', models.PositiveSmallIntegerField()),
+                ('title', models.CharField(max_length=64)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=6)),
+            ],
+        ),
+        migrations.RemoveConstraint(
+            model_name='revenuerollup',
+            name='revenue_rollup_bucket_unique',
+        ),
+        migrations.AddField(
+            model_name='revenuerollup',
+            name='archived',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddConstraint(
+            model_name='revenuerollup',
+            constraint=models.UniqueConstraint(fields=('granularity', 'status', 'archived', 'bucket'), name='revenue_rollup_bucket_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['status', 'created_at'], name='archived_status_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedorderitemrelation',
+            name='order',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='orders', to='orders.archivedorder'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0012_order_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'Оплачено'), _negated=True), fields=['table_number', 'created_at'], name='order_open_table_idx'),
+        ),
+    ]
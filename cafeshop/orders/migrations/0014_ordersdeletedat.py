@@ -0,0 +1,20 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0013_order_open_table_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrdersDeletedAt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('deleted_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -1,7 +1,19 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.db.models import Sum, F, Q
+from django.db.models.functions import Now
+from django.contrib.postgres.indexes import GinIndex
+from django.core.serializers.json import DjangoJSONEncoder
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.urls import reverse_lazy
+from django.utils import timezone
 
 from items.models import Item
+from .signals import orders_created, orders_status_changed, orders_repriced
+
+
+SEARCH_CONFIG = 'simple'
 
 
 # Модель заказа
@@ -10,11 +22,90 @@ class Order(models.Model):
         PENDING = 'В ожидании'
         READY = 'Готово'
         PAID = 'Оплачено'
+
+        @classmethod
+        def get_transitions(cls) -> dict:
+            '''Метод получения таблицы разрешённых переходов: статус -> статусы, в которые можно перейти'''
+            return {
+                cls.PENDING: (cls.READY, cls.PAID),
+                cls.READY: (cls.PENDING, cls.PAID),
+                # оплаченный заказ больше не меняется
+                cls.PAID: (),
+            }
+
+        @property
+        def targets(self) -> tuple:
+            '''Статусы, в которые разрешён переход из этого статуса'''
+            return self.get_transitions()[self]
+
+        @property
+        def sources(self) -> list[str]:
+            '''Статусы, из которых разрешён переход в этот статус'''
+            return [status.value for status, targets in self.get_transitions().items() if self in targets]
     
     table_number = models.IntegerField()
     status = models.CharField(choices=StatusType, default=StatusType.PENDING)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # сумма заказа хранится и пересчитывается при записи позиций
+    total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # номер версии растёт при каждой смене статуса (оптимистичная блокировка)
+    version = models.PositiveIntegerField(default=1)
+    # поисковый вектор вычисляется СУБД при каждой записи строки
+    search_vector = models.GeneratedField(
+        expression=SearchVector('table_number', 'status', config=SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='order_search_vector_gin'),
+            models.Index(fields=['table_number', 'created_at'], name='order_table_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+            # порядок списков заказов и курсорная пагинация
+            models.Index(fields=['-created_at', '-id'], name='order_created_id_idx'),
+            # открытые счета столов: неоплаченных заказов немного, индекс остаётся маленьким
+            models.Index(
+                fields=['table_number', 'created_at'], name='order_open_table_idx', condition=~Q(status='Оплачено')
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # статус на момент загрузки, чтобы save() мог отправить orders_status_changed
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        old_status = getattr(self, '_loaded_status', None)
+        if not adding and old_status is not None and old_status != self.status:
+            self.version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = [*kwargs['update_fields'], 'version']
+        super().save(*args, **kwargs)
+        self._loaded_status = self.status
+        if adding:
+            orders_created.send(sender=Order, orders=[self])
+        elif old_status is not None and old_status != self.status:
+            orders_status_changed.send(sender=Order, changes=[(self, old_status)])
+
+    def update_total_price(self):
+        '''Метод пересчёта суммы заказа по сохранённым позициям'''
+        with transaction.atomic():
+            status, old_total = Order.objects.select_for_update().values_list(
+                'status', 'total_price'
+            ).get(pk=self.pk)
+            # актуальный статус нужен обработчикам orders_repriced
+            self.status = self._loaded_status = Order.StatusType(status)
+            total = self.orders.aggregate(total=Sum(F('price') * F('count'))).get('total') or 0
+            self.updated_at = timezone.now()
+            Order.objects.filter(pk=self.pk).update(total_price=total, updated_at=self.updated_at)
+            self.total_price = total
+            if total != old_total:
+                orders_repriced.send(sender=Order, changes=[(self, old_total)])
 
     def get_absolute_url(self):
         return reverse_lazy('orders:order-list')
@@ -28,6 +119,146 @@ class OrderItemRelation(models.Model):
     item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='items')
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='orders')
     count = models.PositiveSmallIntegerField()
+    # название и цена товара на момент заказа
+    title = models.CharField(max_length=64)
+    price = models.DecimalField(max_digits=6, decimal_places=2)
+
+    def save(self, *args, **kwargs):
+        if self.price is None:
+            self.price = self.item.price
+        if not self.title:
+            self.title = self.item.title
+        super().save(*args, **kwargs)
+        self.order.update_total_price()
+
+    def __str__(self):
+        return f'item: {self.item_id}; order:{self.order_id}'
+
+
+# Позиции удаляются и мимо delete() (QuerySet.delete(), каскад при удалении товара),
+# поэтому сумма заказа пересчитывается по post_delete, который Collector отправляет для каждой позиции.
+# При удалении самих заказов пересчитывать нечего
+@receiver(post_delete, sender=OrderItemRelation)
+def reprice_order_after_line_deleted(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Order) or (isinstance(origin, models.QuerySet) and origin.model is Order):
+        return
+    instance.order.update_total_price()
+
+
+# Время последнего удаления или переноса заказов в архив (одна строка). Эти операции
+# не меняют max(updated_at), а Last-Modified списков заказов должен меняться во всех процессах
+class OrdersDeletedAt(models.Model):
+    deleted_at = models.DateTimeField()
+
+
+# Предагрегированная выручка по часам и дням в разрезе статусов
+class RevenueRollup(models.Model):
+    class Granularity(models.TextChoices):
+        HOUR = 'hour'
+        DAY = 'day'
+
+    granularity = models.CharField(max_length=4, choices=Granularity)
+    bucket = models.DateTimeField()
+    status = models.CharField(choices=Order.StatusType)
+    # выручка заказов, перенесённых в архив, хранится отдельными строками
+    archived = models.BooleanField(default=False)
+    orders_count = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularity', 'status', 'archived', 'bucket'], name='revenue_rollup_bucket_unique'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.granularity} {self.bucket}; Статус: {self.status}; Выручка: {self.total}'
+
+
+# Архив оплаченных заказов: строки переносятся из Order командой archive_orders с теми же id
+class ArchivedOrder(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    table_number = models.IntegerField()
+    status = models.CharField(choices=Order.StatusType)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='archived_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'ID: {self.id}; Стол: {self.table_number}; Статус: {self.status} (архив)'
+
+
+# Архив позиций заказов; товар хранится без внешнего ключа, название и цена - в снимке
+class ArchivedOrderItemRelation(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='orders')
+    item_id = models.BigIntegerField()
+    count = models.PositiveSmallIntegerField()
+    title = models.CharField(max_length=64)
+    price = models.DecimalField(max_digits=6, decimal_places=2)
+
+    def __str__(self):
+        return f'item: {self.item_id}; order:{self.order_id} (архив)'
+
+
+# Журнал изменений заказов для потока событий (SSE)
+class OrderEvent(models.Model):
+    class Kind(models.TextChoices):
+        CREATED = 'order_created'
+        STATUS_CHANGED = 'order_status_changed'
+        DELETED = 'order_deleted'
+
+    kind = models.CharField(max_length=32, choices=Kind)
+    # без внешнего ключа: событие удаления переживает сам заказ
+    order_id = models.BigIntegerField()
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    # время по часам БД: с ними сравнивается задержка коммита при чтении журнала
+    created_at = models.DateTimeField(db_default=Now())
+
+    def __str__(self):
+        return f'{self.id}: {self.kind}; Заказ: {self.order_id}'
+
+
+# Ключ идемпотентности запроса создания заказа и сохранённый ответ на него
+class IdempotencyKey(models.Model):
+    key = models.CharField(max_length=255, unique=True)
+    # хэш пути и тела запроса: ключ нельзя повторно использовать с другим заказом
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f'{self.key}: {self.response_status}'
+
+
+# Заявка на создание заказа в очереди: заказ создаётся воркером process_order_queue
+class OrderTicket(models.Model):
+    class StatusType(models.TextChoices):
+        PENDING = 'pending'
+        DONE = 'done'
+        FAILED = 'failed'
+
+    status = models.CharField(max_length=8, choices=StatusType, default=StatusType.PENDING)
+    # проверенные данные заказа: table_number и items с id и count
+    payload = models.JSONField()
+    order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True, related_name='tickets')
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # воркер выбирает только ожидающие заявки, индекс не растёт с историей
+            models.Index(fields=['id'], condition=Q(status='pending'), name='order_ticket_pending_idx'),
+        ]
 
     def __str__(self):
-        return f'item: {self.item_id}; order:{self.order_id}'
\ No newline at end of file
+        return f'{self.id}: {self.status}; Заказ: {self.order_id}'
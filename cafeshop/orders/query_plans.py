@@ -0,0 +1,75 @@
+import json
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .funcs import get_api_queryset, get_page_queryset, encode_cursor, search_orders, filter_date_range
+from .models import Order, OrderItemRelation, OrderEvent
+from .rollup import get_revenue_rollup
+
+
+# Запросы эндпоинтов, план которых проверяется аудитом. Полный список заказов
+# без пагинации не проверяется: он читает всю таблицу по определению
+def get_audit_querysets() -> dict[str, QuerySet]:
+    '''Функция получения проверяемых queryset по имени эндпоинта'''
+    now = timezone.now()
+    month_ago = now - timedelta(days=30)
+    orders = get_api_queryset()
+    last_order = orders.only('id', 'created_at')[50:51].first() or Order(id=0, created_at=now)
+    page_ids = list(orders.values_list('id', flat=True)[:50])
+    return {
+        'orders list page': get_page_queryset(orders, 50),
+        'orders list next page': get_page_queryset(orders, 50, encode_cursor(last_order)),
+        'orders items prefetch': OrderItemRelation.objects.filter(order_id__in=page_ids),
+        'orders search table': search_orders(orders, '7')[:50],
+        'orders search status': search_orders(orders, Order.StatusType.READY)[:50],
+        'orders search text': search_orders(orders, 'ожидании')[:50],
+        'revenue orders': filter_date_range(orders.filter(status=Order.StatusType.READY), month_ago, now),
+        'revenue total': get_revenue_rollup(Order.StatusType.READY, month_ago, now),
+        'paid orders': filter_date_range(Order.objects.filter(status=Order.StatusType.PAID), now - timedelta(days=7), now),
+        'open tab orders': Order.objects.filter(table_number=7).exclude(status=Order.StatusType.PAID),
+        'order events': OrderEvent.objects.filter(id__gt=0).order_by('id')[:500],
+    }
+
+
+def get_plan(queryset: QuerySet) -> dict:
+    '''Функция получения плана запроса в JSON'''
+    return json.loads(queryset.explain(format='json'))[0]['Plan']
+
+
+def iter_plan_nodes(plan: dict):
+    yield plan
+    for node in plan.get('Plans', []):
+        yield from iter_plan_nodes(node)
+
+
+def get_table_rows(table: str) -> int:
+    '''Функция получения оценки количества строк таблицы из статистики'''
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s', [table])
+        row = cursor.fetchone()
+    return max(int(row[0]), 0) if row else 0
+
+
+def find_seq_scans(plan: dict, threshold: int) -> list[tuple[str, int]]:
+    '''Функция поиска последовательных сканирований таблиц больше threshold строк'''
+    scans = []
+    for node in iter_plan_nodes(plan):
+        if node['Node Type'] != 'Seq Scan':
+            continue
+        rows = get_table_rows(node['Relation Name'])
+        if rows > threshold:
+            scans.append((node['Relation Name'], rows))
+    return scans
+
+
+def audit_query_plans(threshold: int) -> dict[str, list[tuple[str, int]]]:
+    '''Функция проверки планов: возвращает эндпоинты с последовательными сканированиями'''
+    problems = {}
+    for name, queryset in get_audit_querysets().items():
+        scans = find_seq_scans(get_plan(queryset), threshold)
+        if scans:
+            problems[name] = scans
+    return problems
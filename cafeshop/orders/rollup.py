@@ -0,0 +1,151 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Q, Sum
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Order, RevenueRollup
+from .signals import orders_created, orders_status_changed, orders_repriced, orders_deleted, orders_archived
+
+
+def floor_hour(value: datetime) -> datetime:
+    return value.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def floor_day(value: datetime) -> datetime:
+    return floor_hour(value).replace(hour=0)
+
+
+def ceil_day(value: datetime) -> datetime:
+    day = floor_day(value)
+    return day if day == value else day + timedelta(days=1)
+
+
+# Инкрементальное обновление витрины выручки
+def apply_revenue_deltas(deltas: list[tuple[datetime, str, int, Decimal]], archived: bool = False):
+    '''Функция применения изменений (created_at, статус, кол-во заказов, сумма) к витрине'''
+    buckets = defaultdict(lambda: [0, Decimal(0)])
+    for created_at, status, count, amount in deltas:
+        for granularity, bucket in (
+            (RevenueRollup.Granularity.HOUR, floor_hour(created_at)),
+            (RevenueRollup.Granularity.DAY, floor_day(created_at)),
+        ):
+            buckets[granularity, bucket, status][0] += count
+            buckets[granularity, bucket, status][1] += amount
+
+    rows = [
+        (granularity, bucket, status, archived, count, amount)
+        for (granularity, bucket, status), (count, amount) in sorted(buckets.items())
+        if count or amount
+    ]
+    if not rows:
+        return
+    # один INSERT ... ON CONFLICT на все строки; единый порядок строк снижает риск взаимных блокировок
+    table = RevenueRollup._meta.db_table
+    values = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(rows))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            INSERT INTO {table} (granularity, bucket, status, archived, orders_count, total)
+            VALUES {values}
+            ON CONFLICT (granularity, status, archived, bucket) DO UPDATE SET
+                orders_count = {table}.orders_count + EXCLUDED.orders_count,
+                total = {table}.total + EXCLUDED.total
+            ''',
+            [value for row in rows for value in row]
+        )
+
+
+@receiver(orders_created, sender=Order)
+def rollup_orders_created(sender, orders, **kwargs):
+    apply_revenue_deltas([
+        (order.created_at, order.status, 1, order.total_price) for order in orders
+    ])
+
+
+@receiver(orders_status_changed, sender=Order)
+def rollup_orders_status_changed(sender, changes, **kwargs):
+    deltas = []
+    for order, old_status in changes:
+        deltas.append((order.created_at, old_status, -1, -order.total_price))
+        deltas.append((order.created_at, order.status, 1, order.total_price))
+    apply_revenue_deltas(deltas)
+
+
+@receiver(orders_repriced, sender=Order)
+def rollup_orders_repriced(sender, changes, **kwargs):
+    apply_revenue_deltas([
+        (order.created_at, order.status, 0, order.total_price - old_total) for order, old_total in changes
+    ])
+
+
+# post_delete приходит и при QuerySet.delete() (действие админки, каскады)
+@receiver(post_delete, sender=Order)
+def rollup_order_deleted(sender, instance, **kwargs):
+    apply_revenue_deltas([(instance.created_at, instance.status, -1, -instance.total_price)])
+
+
+@receiver(orders_deleted, sender=Order)
+def rollup_orders_deleted(sender, orders, **kwargs):
+    apply_revenue_deltas([
+        (order.created_at, order.status, -1, -order.total_price) for order in orders
+    ])
+
+
+# перенос в архив: выручка переходит из рабочих строк витрины в архивные
+@receiver(orders_archived, sender=Order)
+def rollup_orders_archived(sender, orders, **kwargs):
+    apply_revenue_deltas([
+        (order.created_at, order.status, -1, -order.total_price) for order in orders
+    ])
+    apply_revenue_deltas([
+        (order.created_at, order.status, 1, order.total_price) for order in orders
+    ], archived=True)
+
+
+REVENUE_AGGREGATES = {'total': Sum('total'), 'orders_count': Sum('orders_count')}
+
+
+# Выручка за период: целые дни берутся из дневных строк, края периода - из часовых
+def get_revenue_total(status: str, date_from: datetime | None = None, date_to: datetime | None = None,
+                      include_archived: bool = False):
+    '''Функция получения выручки по статусу за период [date_from, date_to) с точностью до часа'''
+    result = get_revenue_rollup(status, date_from, date_to, include_archived).aggregate(**REVENUE_AGGREGATES)
+    return result['total'] if result['orders_count'] else None
+
+
+async def aget_revenue_total(status: str, date_from: datetime | None = None, date_to: datetime | None = None,
+                             include_archived: bool = False):
+    '''Асинхронная версия get_revenue_total'''
+    result = await get_revenue_rollup(status, date_from, date_to, include_archived).aaggregate(**REVENUE_AGGREGATES)
+    return result['total'] if result['orders_count'] else None
+
+
+def get_revenue_rollup(status: str, date_from: datetime | None = None, date_to: datetime | None = None,
+                       include_archived: bool = False):
+    '''Функция получения строк витрины, покрывающих период'''
+    hour_from = floor_hour(date_from) if date_from else None
+    hour_to = floor_hour(date_to) if date_to else None
+    day_from = ceil_day(hour_from) if hour_from else None
+    day_to = floor_day(hour_to) if hour_to else None
+
+    hours = Q(granularity=RevenueRollup.Granularity.HOUR)
+    days = Q(granularity=RevenueRollup.Granularity.DAY)
+    if day_from and day_to and day_from >= day_to:
+        condition = hours & Q(bucket__gte=hour_from, bucket__lt=hour_to)
+    else:
+        if day_from:
+            days &= Q(bucket__gte=day_from)
+        if day_to:
+            days &= Q(bucket__lt=day_to)
+        condition = days
+        if hour_from and hour_from < day_from:
+            condition |= hours & Q(bucket__gte=hour_from, bucket__lt=day_from)
+        if hour_to and day_to < hour_to:
+            condition |= hours & Q(bucket__gte=day_to, bucket__lt=hour_to)
+
+    rows = RevenueRollup.objects.filter(condition, status=status)
+    return rows if include_archived else rows.filter(archived=False)
@@ -0,0 +1,16 @@
+from django.dispatch import Signal
+
+
+# Сигналы изменения заказов. Отправляются как из save() модели, так и из пакетных
+# операций, которые этот метод обходят. Одиночное удаление и QuerySet.delete() (админка)
+# отслеживаются стандартным post_delete, пакетное удаление API - сигналом orders_deleted.
+# orders_created: orders - список созданных заказов
+orders_created = Signal()
+# orders_status_changed: changes - список пар (заказ, прежний статус)
+orders_status_changed = Signal()
+# orders_repriced: changes - список пар (заказ, прежняя сумма)
+orders_repriced = Signal()
+# orders_deleted: orders - список заказов, удалённых пакетно без Collector
+orders_deleted = Signal()
+# orders_archived: orders - список заказов, перенесённых в архив (отправляется в транзакции переноса)
+orders_archived = Signal()
@@ -0,0 +1,105 @@
+import json
+
+from django.db.models import QuerySet
+from django.http.request import HttpRequest
+from django.http.response import StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .funcs import iter_orders_json, get_order_json
+
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+STREAM_CHUNK_SIZE = 500
+
+
+def get_stream_mode(request: HttpRequest) -> str | None:
+    '''Функция определения режима потоковой отдачи: ndjson, json или None'''
+    if NDJSON_CONTENT_TYPE in request.headers.get('Accept', ''):
+        return 'ndjson'
+    if request.GET.get('stream') in ('1', 'true'):
+        return 'json'
+    return None
+
+
+def dumps(data) -> str:
+    return json.dumps(data, cls=DjangoJSONEncoder)
+
+
+# Заказы читаются пачками через серверный курсор и кодируются по одному
+def iter_orders_chunked(orders: QuerySet):
+    '''Генератор JSON объектов заказов с чтением queryset пачками'''
+    return iter_orders_json(orders.iterator(chunk_size=STREAM_CHUNK_SIZE))
+
+
+def stream_orders(orders: QuerySet, mode: str):
+    '''Генератор тела ответа со списком заказов'''
+    if mode == 'ndjson':
+        for order in iter_orders_chunked(orders):
+            yield dumps(order) + '\n'
+        return
+    yield '['
+    for i, order in enumerate(iter_orders_chunked(orders)):
+        yield (',' if i else '') + dumps(order)
+    yield ']'
+
+
+# total берётся из той же функции, что и в обычном ответе (витрина выручки, с архивом
+# при archived=1), и пишется в конце потока после заказов
+def stream_revenue(orders: QuerySet, mode: str, get_total):
+    '''Генератор тела ответа с выручкой, get_total - функция получения total'''
+    if mode == 'json':
+        yield '{"orders": ['
+    for i, order in enumerate(iter_orders_chunked(orders)):
+        if mode == 'ndjson':
+            yield dumps(order) + '\n'
+        else:
+            yield (',' if i else '') + dumps(order)
+    total = get_total()
+    if mode == 'ndjson':
+        yield dumps({'total': total}) + '\n'
+    else:
+        yield '], "total": ' + dumps(total) + '}'
+
+
+def get_streaming_response(content, mode: str) -> StreamingHttpResponse:
+    content_type = NDJSON_CONTENT_TYPE if mode == 'ndjson' else 'application/json'
+    return StreamingHttpResponse(content, content_type=content_type)
+
+
+# Асинхронные версии для ASGI: заказы читаются через aiterator
+async def aiter_orders_chunked(orders: QuerySet):
+    '''Асинхронный генератор JSON объектов заказов с чтением queryset пачками'''
+    async for order in orders.aiterator(chunk_size=STREAM_CHUNK_SIZE):
+        yield get_order_json(order)
+
+
+async def astream_orders(orders: QuerySet, mode: str):
+    '''Асинхронный генератор тела ответа со списком заказов'''
+    if mode == 'ndjson':
+        async for order in aiter_orders_chunked(orders):
+            yield dumps(order) + '\n'
+        return
+    yield '['
+    i = 0
+    async for order in aiter_orders_chunked(orders):
+        yield (',' if i else '') + dumps(order)
+        i += 1
+    yield ']'
+
+
+async def astream_revenue(orders: QuerySet, mode: str, aget_total):
+    '''Асинхронный генератор тела ответа с выручкой, aget_total - асинхронная функция получения total'''
+    if mode == 'json':
+        yield '{"orders": ['
+    i = 0
+    async for order in aiter_orders_chunked(orders):
+        if mode == 'ndjson':
+            yield dumps(order) + '\n'
+        else:
+            yield (',' if i else '') + dumps(order)
+        i += 1
+    total = await aget_total()
+    if mode == 'ndjson':
+        yield dumps({'total': total}) + '\n'
+    else:
+        yield '], "total": ' + dumps(total) + '}'
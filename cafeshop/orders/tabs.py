@@ -0,0 +1,87 @@
+from decimal import Decimal
+
+from django.db import connections, router
+
+from .funcs import change_orders_status
+from .models import Order, OrderItemRelation
+
+
+# Открытые счета столов одним запросом: неоплаченные заказы читаются по частичному индексу
+# order_open_table_idx, позиции одного товара по одной цене объединяются. Суммы отдаются
+# строками, как Decimal в остальных ответах API
+OPEN_TABS_SQL = '''
+    WITH open_orders AS (
+        SELECT id, table_number, status, created_at, total_price, version
+        FROM {orders}
+        WHERE NOT (status = %s){table_filter}
+    ),
+    lines AS (
+        SELECT o.table_number, r.item_id, r.title, r.price, SUM(r.count) AS count
+        FROM open_orders AS o JOIN {lines} AS r ON r.order_id = o.id
+        GROUP BY o.table_number, r.item_id, r.title, r.price
+    )
+    SELECT t.table_number, t.orders, t.total::text, COALESCE(l.items, '[]')
+    FROM (
+        SELECT table_number, SUM(total_price) AS total, JSON_AGG(JSON_BUILD_OBJECT(
+            'id', id, 'status', status, 'created_at', created_at,
+            'total_price', total_price::text, 'version', version
+        ) ORDER BY created_at, id) AS orders
+        FROM open_orders GROUP BY table_number
+    ) AS t
+    LEFT JOIN (
+        SELECT table_number, JSON_AGG(JSON_BUILD_OBJECT(
+            'id', item_id, 'title', title, 'price', price::text, 'count', count,
+            'total', (price * count)::text
+        ) ORDER BY title, item_id, price) AS items
+        FROM lines GROUP BY table_number
+    ) AS l USING (table_number)
+    ORDER BY t.table_number
+'''
+
+
+def get_open_tabs(table_number: int | None = None) -> list[dict]:
+    '''Функция получения открытых счетов всех столов или одного стола'''
+    connection = connections[router.db_for_read(Order)]
+    sql = OPEN_TABS_SQL.format(
+        orders=connection.ops.quote_name(Order._meta.db_table),
+        lines=connection.ops.quote_name(OrderItemRelation._meta.db_table),
+        table_filter='' if table_number is None else ' AND table_number = %s',
+    )
+    params = [Order.StatusType.PAID.value]
+    if table_number is not None:
+        params.append(table_number)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return [
+        {'table_number': table, 'orders': orders, 'items': items, 'total': total}
+        for table, orders, total, items in rows
+    ]
+
+
+def get_open_tab(table_number: int) -> dict:
+    '''Функция получения открытого счёта стола (пустого, если неоплаченных заказов нет)'''
+    tabs = get_open_tabs(table_number)
+    return tabs[0] if tabs else {'table_number': table_number, 'orders': [], 'items': [], 'total': '0.00'}
+
+
+# Закрытие счёта: заказы переводятся в Оплачено одним условным UPDATE. Если переданы ids
+# (заказы из показанного гостю счёта), заказ, добавленный после печати счёта, не закрывается
+def settle_table(table_number: int, ids: list[int] | None = None) -> tuple[list[int], list[int], Decimal]:
+    '''Функция закрытия счёта стола, возвращает id оплаченных и не оплаченных заказов и сумму'''
+    open_ids = list(
+        Order.objects.filter(table_number=table_number).exclude(
+            status=Order.StatusType.PAID
+        ).order_by('id').values_list('id', flat=True)
+    )
+    if ids is None:
+        ids = open_ids
+    open_ids = set(open_ids)
+    ids_to_pay = [pk for pk in ids if pk in open_ids]
+    paid = change_orders_status(ids_to_pay, Order.StatusType.PAID) if ids_to_pay else []
+    paid_ids = {order.id for order in paid}
+    return (
+        [pk for pk in ids if pk in paid_ids],
+        [pk for pk in ids if pk not in paid_ids],
+        sum((order.total_price for order in paid), Decimal('0.00')),
+    )
@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from orders.archive import archive_orders
+from orders.models import Order, OrderItemRelation, Item
+
+
+# Аналитика продаж по товарам, столам и часам
+class AnalyticsTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.coffee = Item.objects.create(title='Кофе', price=150)
+        self.tea = Item.objects.create(title='Чай', price=100)
+        order1 = Order.objects.create(table_number=1, status='Оплачено')
+        order2 = Order.objects.create(table_number=2, status='Оплачено')
+        order3 = Order.objects.create(table_number=2)
+        OrderItemRelation.objects.create(order=order1, item=self.coffee, count=2)
+        OrderItemRelation.objects.create(order=order1, item=self.tea, count=1)
+        OrderItemRelation.objects.create(order=order2, item=self.tea, count=4)
+        OrderItemRelation.objects.create(order=order3, item=self.coffee, count=1)
+        self.hour = order1.created_at.hour
+        self.url = reverse('orders:order-api-analytics')
+        return super().setUp()
+
+    def test_analytics(self):
+        with self.assertNumQueries(3):
+            data = self.client.get(self.url, data={'status': 'Оплачено'}).json()
+        self.assertEqual(data['items'], [
+            {'item_id': self.tea.id, 'title': 'Чай', 'quantity': 5, 'revenue': '500.00'},
+            {'item_id': self.coffee.id, 'title': 'Кофе', 'quantity': 2, 'revenue': '300.00'},
+        ])
+        self.assertEqual(data['tables'], [
+            {'table_number': 1, 'orders_count': 1, 'revenue': '400.00'},
+            {'table_number': 2, 'orders_count': 1, 'revenue': '400.00'},
+        ])
+        self.assertEqual(data['hours'], [{'hour': self.hour, 'orders_count': 2, 'revenue': '800.00'}])
+
+    def test_archived_orders(self):
+        # заказ стола 1 уходит в архив, заказ стола 2 остаётся в рабочих таблицах
+        Order.objects.filter(table_number=2).update(status='Готово')
+        archive_orders(timezone.now())
+        data = self.client.get(self.url).json()
+        self.assertEqual([row['table_number'] for row in data['tables']], [2])
+        with self.assertNumQueries(6):
+            data = self.client.get(self.url, data={'archived': '1'}).json()
+        self.assertEqual(data['items'], [
+            {'item_id': self.tea.id, 'title': 'Чай', 'quantity': 5, 'revenue': '500.00'},
+            {'item_id': self.coffee.id, 'title': 'Кофе', 'quantity': 3, 'revenue': '450.00'},
+        ])
+        self.assertEqual(data['tables'], [
+            {'table_number': 1, 'orders_count': 1, 'revenue': '400.00'},
+            {'table_number': 2, 'orders_count': 2, 'revenue': '550.00'},
+        ])
+        self.assertEqual(data['hours'], [{'hour': self.hour, 'orders_count': 3, 'revenue': '950.00'}])
+
+    def test_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            data = self.client.get(self.url).json()
+        self.assertEqual(data['tables'][1]['revenue'], '550.00')
+
+    def test_filters(self):
+        data = self.client.get(self.url, data={'from': '2000-01-01', 'to': '2000-02-01'}).json()
+        self.assertEqual(data, {'items': [], 'tables': [], 'hours': []})
+        self.assertEqual(self.client.get(self.url, data={'status': 'Съеден'}).status_code, 400)
+
+    def test_exact_bounds(self):
+        Order.objects.filter(table_number=1).update(created_at='2025-01-01T10:30:00Z')
+        data = self.client.get(self.url, data={'from': '2025-01-01T10:15:00Z', 'to': '2025-01-01T10:45:00Z'}).json()
+        self.assertEqual(data['tables'], [{'table_number': 1, 'orders_count': 1, 'revenue': '400.00'}])
+        data = self.client.get(self.url, data={'from': '2025-01-01T10:31:00Z', 'to': '2025-01-01T11:00:00Z'}).json()
+        self.assertEqual(data['tables'], [])
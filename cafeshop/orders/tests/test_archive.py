@@ -0,0 +1,47 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from orders.archive import archive_orders
+from orders.models import Order, OrderItemRelation, ArchivedOrder, ArchivedOrderItemRelation, Item
+from orders.rollup import get_revenue_total
+
+
+# Перенос оплаченных заказов в архив
+class ArchiveOrdersTestCase(TestCase):
+
+    def setUp(self):
+        item = Item.objects.create(title='Кофе', price=150)
+        self.paid = [Order.objects.create(table_number=i, status='Оплачено') for i in range(1, 4)]
+        self.pending = Order.objects.create(table_number=4)
+        for order in self.paid + [self.pending]:
+            OrderItemRelation.objects.create(order=order, item=item, count=2)
+        return super().setUp()
+
+    def test_archive_in_batches(self):
+        self.assertEqual(archive_orders(timezone.now(), batch_size=2), 3)
+        self.assertEqual(list(Order.objects.values_list('id', flat=True)), [self.pending.id])
+        self.assertEqual(OrderItemRelation.objects.count(), 1)
+
+        archived = ArchivedOrder.objects.prefetch_related('orders').get(id=self.paid[0].id)
+        self.assertEqual((archived.table_number, archived.status, archived.total_price), (1, 'Оплачено', 300))
+        self.assertEqual([(rel.title, rel.price, rel.count) for rel in archived.orders.all()], [('Кофе', 150, 2)])
+        self.assertEqual(ArchivedOrderItemRelation.objects.count(), 3)
+
+    def test_revenue_with_archive(self):
+        archive_orders(timezone.now())
+        self.assertIsNone(get_revenue_total('Оплачено'))
+        self.assertEqual(get_revenue_total('Оплачено', include_archived=True), 900)
+        self.assertEqual(get_revenue_total('В ожидании', include_archived=True), 300)
+
+        resp = self.client.get(reverse('orders:order-paid'), data={'archived': '1'})
+        self.assertEqual(resp.context['total'], 900)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('archive_orders', '--older-than', '1', stdout=out)
+        self.assertEqual(ArchivedOrder.objects.count(), 0)
+        call_command('archive_orders', '--older-than', '0', stdout=out)
+        self.assertEqual(ArchivedOrder.objects.count(), 3)
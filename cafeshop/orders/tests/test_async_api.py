@@ -0,0 +1,67 @@
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+from orders.models import Order, OrderItemRelation, Item, RevenueRollup
+
+
+# Асинхронные версии REST API дают те же ответы, что и синхронные
+class AsyncApiTestCase(TestCase):
+
+    def setUp(self):
+        self.item1 = Item.objects.create(title='Кофе', price=150)
+        self.item2 = Item.objects.create(title='Торт', price=250)
+        self.order1 = Order.objects.create(table_number=1)
+        self.order2 = Order.objects.create(table_number=2, status='Готово')
+        OrderItemRelation.objects.create(order=self.order1, item=self.item1, count=1)
+        OrderItemRelation.objects.create(order=self.order1, item=self.item2, count=2)
+        OrderItemRelation.objects.create(order=self.order2, item=self.item1, count=2)
+        return super().setUp()
+
+    async def test_list_and_revenue_match_sync(self):
+        for sync_name, async_name, params in (
+            ('orders:order-api-list', 'orders:order-async-api-list', {}),
+            ('orders:order-api-list', 'orders:order-async-api-list', {'q': 'Готово'}),
+            ('orders:order-api-list', 'orders:order-async-api-list', {'limit': 1}),
+            ('orders:order-api-revenue', 'orders:order-async-api-revenue', {}),
+        ):
+            expected = (await self.async_client.get(reverse(sync_name), params)).json()
+            resp = await self.async_client.get(reverse(async_name), params)
+            self.assertEqual(resp.status_code, 200, 'Неверный статус')
+            self.assertEqual(resp.json(), expected)
+
+    async def test_stream(self):
+        resp = await self.async_client.get(reverse('orders:order-async-api-list'), {'stream': 1})
+        content = b''.join([chunk async for chunk in resp.streaming_content])
+        expected = (await self.async_client.get(reverse('orders:order-api-list'))).json()
+        self.assertEqual(json.loads(content), expected)
+
+    async def test_not_modified(self):
+        url = reverse('orders:order-async-api-list')
+        resp = await self.async_client.get(url)
+        resp = await self.async_client.get(url, headers={'if_none_match': resp['ETag']})
+        self.assertEqual(resp.status_code, 304, 'Неверный статус')
+
+    async def test_create_update_delete(self):
+        url = reverse('orders:order-async-api-list')
+        body = {'table_number': 3, 'items': [{'id': self.item1.id, 'count': 3}]}
+        resp = await self.async_client.post(url, data=body, content_type='application/json')
+        self.assertEqual(resp.status_code, 201, resp.json())
+        order_id = resp.json()['id']
+
+        url = reverse('orders:order-async-api-ud', args=(order_id, ))
+        resp = await self.async_client.put(url, data={'status': 'Оплачено'}, content_type='application/json')
+        self.assertEqual(resp.status_code, 200, resp.json())
+        order = await Order.objects.aget(id=order_id)
+        self.assertEqual(order.status, 'Оплачено')
+        paid = await RevenueRollup.objects.filter(status='Оплачено', granularity='day').aget()
+        self.assertEqual((paid.orders_count, paid.total), (1, 450))
+
+        resp = await self.async_client.put(url, data={'status': 'прикол'}, content_type='application/json')
+        self.assertEqual(resp.status_code, 400, 'Неверный статус')
+
+        resp = await self.async_client.delete(url)
+        self.assertEqual(resp.status_code, 204, 'Неверный статус')
+        self.assertFalse(await Order.objects.filter(id=order_id).aexists())
+        resp = await self.async_client.delete(url)
+        self.assertEqual(resp.status_code, 400, 'Неверный статус')
@@ -0,0 +1,69 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from orders.models import Order, OrderItemRelation, Item
+
+
+# Создание заказов фиксированным числом запросов
+class BatchCreateOrdersTestCase(TestCase):
+
+    def setUp(self):
+        self.items = [Item.objects.create(title=f'Товар {i}', price=100 + i) for i in range(10)]
+        return super().setUp()
+
+    def post_order(self, items_count):
+        body = {
+            'table_number': 3,
+            'items': [{'id': item.id, 'count': 2} for item in self.items[:items_count]]
+        }
+        url = reverse('orders:order-api-list')
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(url, data=body, content_type='application/json')
+        self.assertEqual(resp.status_code, 201, resp.json())
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_depend_on_items(self):
+        self.post_order(1)  # прогрев кэша каталога
+        self.assertEqual(self.post_order(1), self.post_order(10))
+
+    def test_batch_create(self):
+        url = reverse('orders:order-api-batch')
+        body = [
+            {'table_number': table_number, 'items': [{'id': item.id, 'count': 1} for item in self.items]}
+            for table_number in range(1, 21)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(url, data=body, content_type='application/json')
+        self.assertEqual(resp.status_code, 201, resp.json())
+        self.assertLessEqual(len(ctx.captured_queries), 7)
+        self.assertEqual(Order.objects.count(), 20)
+        self.assertEqual(OrderItemRelation.objects.count(), 200)
+        self.assertEqual([order['table_number'] for order in resp.json()], list(range(1, 21)))
+        self.assertEqual(resp.json()[0]['total_price'], '{:.2f}'.format(sum(i.price for i in self.items)))
+
+    def test_failed_batch_creates_nothing(self):
+        url = reverse('orders:order-api-batch')
+        body = [
+            {'table_number': 1, 'items': [{'id': self.items[0].id, 'count': 1}]},
+            {'table_number': 2, 'items': [{'id': 0, 'count': 1}]},
+        ]
+        resp = self.client.post(url, data=body, content_type='application/json')
+        self.assertEqual(resp.status_code, 400, 'Неверный статус')
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_create_order_form(self):
+        url = reverse('orders:order-create')
+        data = {
+            'table_number': 4,
+            'form-TOTAL_FORMS': 2,
+            'form-INITIAL_FORMS': 0,
+            'form-0-item': self.items[0].id,
+            'form-0-count': 1,
+            'form-1-item': self.items[1].id,
+            'form-1-count': 3,
+        }
+        resp = self.client.post(url, data=data)
+        self.assertRedirects(resp, reverse('orders:order-list'))
+        order = Order.objects.get(table_number=4)
+        self.assertEqual(order.orders.count(), 2)
@@ -0,0 +1,70 @@
+from django.test import TestCase
+from django.urls import reverse
+from orders.models import Order, OrderItemRelation, OrderEvent, RevenueRollup, Item
+
+
+# Пакетная смена статуса и удаление заказов
+class BulkOrdersTestCase(TestCase):
+
+    def setUp(self):
+        item = Item.objects.create(title='Кофе', price=150)
+        self.orders = [Order.objects.create(table_number=i) for i in range(1, 4)]
+        for order in self.orders:
+            OrderItemRelation.objects.create(order=order, item=item, count=2)
+        self.ids = [order.id for order in self.orders]
+        self.url = reverse('orders:order-api-bulk')
+        return super().setUp()
+
+    def post(self, body):
+        return self.client.post(self.url, data=body, content_type='application/json')
+
+    def test_bulk_status(self):
+        # условный UPDATE без блокировки строк и обновление витрины выручки
+        with self.assertNumQueries(4):
+            resp = self.post({'ids': self.ids + [0], 'action': 'status', 'status': 'Оплачено'})
+        self.assertEqual(resp.status_code, 200, 'Неверный статус')
+        self.assertEqual(resp.json(), {'succeeded': self.ids, 'failed': [0]})
+        self.assertEqual(Order.objects.filter(status='Оплачено').count(), 3)
+        paid = RevenueRollup.objects.get(granularity='day', status='Оплачено')
+        self.assertEqual((paid.orders_count, paid.total), (3, 900))
+
+    def test_bulk_status_skips_forbidden_transitions(self):
+        Order.objects.filter(id=self.ids[0]).update(status='Оплачено')
+        resp = self.post({'ids': self.ids, 'action': 'status', 'status': 'В ожидании'})
+        self.assertEqual(resp.json(), {'succeeded': [], 'failed': self.ids})
+        resp = self.post({'ids': self.ids, 'action': 'status', 'status': 'Готово'})
+        self.assertEqual(resp.json(), {'succeeded': self.ids[1:], 'failed': self.ids[:1]})
+
+    def test_bulk_delete(self):
+        # блокировка, три DELETE/UPDATE по таблицам, витрина выручки и время удаления -
+        # число запросов не зависит от количества заказов
+        with self.assertNumQueries(8):
+            resp = self.post({'ids': self.ids[:2] + [0], 'action': 'delete'})
+        self.assertEqual(resp.status_code, 200, 'Неверный статус')
+        self.assertEqual(resp.json(), {'succeeded': self.ids[:2], 'failed': [0]})
+        self.assertEqual(list(Order.objects.values_list('id', flat=True)), self.ids[2:])
+        self.assertEqual(OrderItemRelation.objects.count(), 1)
+        pending = RevenueRollup.objects.get(granularity='day', status='В ожидании')
+        self.assertEqual((pending.orders_count, pending.total), (1, 300))
+
+    def test_bulk_delete_events(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.post({'ids': self.ids, 'action': 'delete'})
+        # события удаления всей пачки пишутся одним INSERT после коммита
+        with self.assertNumQueries(1):
+            for callback in callbacks:
+                callback()
+        self.assertEqual(
+            list(OrderEvent.objects.filter(kind='order_deleted').order_by('order_id').values_list('order_id', flat=True)),
+            self.ids
+        )
+
+    def test_bulk_errors(self):
+        for body in (
+            {'ids': [], 'action': 'delete'},
+            {'ids': ['1'], 'action': 'delete'},
+            {'ids': self.ids, 'action': 'archive'},
+            {'ids': self.ids, 'action': 'status', 'status': 'Съеден'},
+        ):
+            self.assertEqual(self.post(body).status_code, 400, 'Неверный статус')
+        self.assertEqual(Order.objects.filter(status='В ожидании').count(), 3)
@@ -0,0 +1,53 @@
+from django.test import TestCase
+from django.urls import reverse
+from orders.models import Order, OrderItemRelation, Item
+
+
+# Условные GET запросы к списку заказов и выручке
+class ConditionalGetTestCase(TestCase):
+
+    def setUp(self):
+        self.item = Item.objects.create(title='Кофе', price=150)
+        self.order1 = Order.objects.create(table_number=1)
+        self.order2 = Order.objects.create(table_number=2, status='Готово')
+        for order in (self.order1, self.order2):
+            OrderItemRelation.objects.create(order=order, item=self.item, count=1)
+        return super().setUp()
+
+    def assertNotModified(self, url, **headers):
+        with self.assertNumQueries(1):
+            resp = self.client.get(url, headers=headers)
+        self.assertEqual(resp.status_code, 304, 'Неверный статус')
+
+    def test_etag(self):
+        for url in (reverse('orders:order-api-list'), reverse('orders:order-api-revenue')):
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200, 'Неверный статус')
+            self.assertNotModified(url, if_none_match=resp['ETag'])
+
+    def test_last_modified(self):
+        url = reverse('orders:order-api-list')
+        resp = self.client.get(url)
+        self.assertNotModified(url, if_modified_since=resp['Last-Modified'])
+
+    def test_etag_changes_on_write(self):
+        url = reverse('orders:order-api-list')
+        etag = self.client.get(url)['ETag']
+        self.client.put(
+            reverse('orders:order-api-ud', args=(self.order1.id, )),
+            data={'status': 'Готово'}, content_type='application/json'
+        )
+        resp = self.client.get(url, headers={'if_none_match': etag})
+        self.assertEqual(resp.status_code, 200, 'Неверный статус')
+
+        etag = resp['ETag']
+        self.client.delete(reverse('orders:order-api-ud', args=(self.order2.id, )))
+        resp = self.client.get(url, headers={'if_none_match': etag})
+        self.assertEqual(resp.status_code, 200, 'Неверный статус')
+        self.assertEqual(len(resp.json()), 1)
+
+    def test_etag_depends_on_representation(self):
+        url = reverse('orders:order-api-list')
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(url, data={'q': '1'})['ETag'], etag)
+        self.assertNotEqual(self.client.get(url, headers={'accept': 'application/x-ndjson'})['ETag'], etag)
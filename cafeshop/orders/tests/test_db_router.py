@@ -0,0 +1,74 @@
+from unittest import skipUnless
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from cafeshop.db_router import ReplicaRouter, PIN_COOKIE_NAME, _replica_reads, _pinned
+from orders.models import Order, OrderItemRelation, Item
+
+
+# Чтение с реплики: данные коммитятся, чтобы зеркальное соединение их видело
+@skipUnless('replica1' in settings.DATABASES, 'нужна реплика из cafeshop.test_settings')
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTestCase(TransactionTestCase):
+    # без тестовых настроек алиаса реплики нет, и класс пропускается
+    databases = {'default', 'replica1'} & set(settings.DATABASES)
+
+    def setUp(self):
+        self.item = Item.objects.create(title='Кофе', price=150)
+        order = Order.objects.create(table_number=1)
+        OrderItemRelation.objects.create(order=order, item=self.item, count=1)
+        return super().setUp()
+
+    def get(self, url_name, client=None):
+        with CaptureQueriesContext(connections['default']) as primary:
+            with CaptureQueriesContext(connections['replica1']) as replica:
+                resp = (client or self.client).get(reverse(url_name))
+        self.assertEqual(resp.status_code, 200, 'Неверный статус')
+        return resp, len(primary), len(replica)
+
+    def test_reads_go_to_replica(self):
+        for url_name in (
+            'orders:order-api-list', 'orders:order-api-revenue', 'orders:order-list', 'orders:order-api-export'
+        ):
+            resp, primary, replica = self.get(url_name)
+            if resp.streaming:
+                with CaptureQueriesContext(connections['default']) as primary:
+                    with CaptureQueriesContext(connections['replica1']) as replica:
+                        b''.join(resp.streaming_content)
+                primary, replica = len(primary), len(replica)
+            self.assertEqual(primary, 0, url_name)
+            self.assertGreater(replica, 0, url_name)
+
+    def test_async_reads_go_to_replica(self):
+        with CaptureQueriesContext(connections['replica1']) as replica:
+            resp = async_to_sync(self.async_client.get)(reverse('orders:order-async-api-list'))
+        self.assertEqual(len(resp.json()), 1)
+        self.assertGreater(len(replica), 0)
+
+    def test_read_after_write_stays_on_primary(self):
+        resp = self.client.post(
+            reverse('orders:order-api-list'), content_type='application/json',
+            data={'table_number': 2, 'items': [{'id': self.item.id, 'count': 1}]},
+        )
+        self.assertIn(PIN_COOKIE_NAME, resp.cookies)
+        resp, primary, replica = self.get('orders:order-api-list')
+        self.assertEqual(replica, 0)
+        self.assertEqual(len(resp.json()), 2)
+
+    def test_write_pins_rest_of_request(self):
+        router = ReplicaRouter()
+        # вне запроса признак записи не сбрасывается middleware, поэтому задаётся явно
+        pinned = _pinned.set(False)
+        token = _replica_reads.set(True)
+        try:
+            self.assertEqual(router.db_for_read(Order), 'replica1')
+            self.assertEqual(router.db_for_write(Order), 'default')
+            self.assertEqual(router.db_for_read(Order), 'default')
+        finally:
+            _replica_reads.reset(token)
+            _pinned.reset(pinned)
+        self.assertFalse(router.allow_migrate('replica1', 'orders'))
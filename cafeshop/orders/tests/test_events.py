@@ -0,0 +1,129 @@
+from io import StringIO
+import asyncio
+import json
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from orders.async_api_views import astream_order_events
+from orders.events import get_event_log
+from orders.models import Order, OrderEvent, Item
+
+
+# Поток событий заказов (SSE)
+@override_settings(
+    ORDER_EVENTS_STREAM_TIMEOUT=0.3, ORDER_EVENTS_HEARTBEAT=0.1, ORDER_EVENTS_POLL_INTERVAL=0.05,
+    ORDER_EVENTS_COMMIT_LAG=0
+)
+class OrderEventsTestCase(TestCase):
+
+    def setUp(self):
+        self.item = Item.objects.create(title='Кофе', price=150)
+        return super().setUp()
+
+    def make_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            url = reverse('orders:order-api-list')
+            body = {'table_number': 3, 'items': [{'id': self.item.id, 'count': 2}]}
+            order_id = self.client.post(url, data=body, content_type='application/json').json()['id']
+        with self.captureOnCommitCallbacks(execute=True):
+            url = reverse('orders:order-api-ud', args=(order_id, ))
+            self.client.put(url, data={'status': 'Готово'}, content_type='application/json')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(url)
+        return order_id
+
+    async def aread_content(self, headers):
+        resp = await self.async_client.get(reverse('orders:order-api-events'), headers=headers)
+        self.assertEqual(resp['Content-Type'], 'text/event-stream')
+        return b''.join([chunk async for chunk in resp.streaming_content]).decode()
+
+    def read_events(self, **headers):
+        content = async_to_sync(self.aread_content)(headers)
+        events = []
+        for block in content.split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+            if 'event' in fields:
+                events.append(fields)
+        return events
+
+    def check_stream(self):
+        last_id = get_event_log().last_id()
+        order_id = self.make_changes()
+        events = self.read_events(last_event_id=str(last_id))
+        self.assertEqual(
+            [event['event'] for event in events],
+            ['order_created', 'order_status_changed', 'order_deleted']
+        )
+        self.assertEqual(json.loads(events[0]['data'])['id'], order_id)
+        self.assertEqual(json.loads(events[1]['data'])['old_status'], 'В ожидании')
+
+        # продолжение с середины потока
+        events = self.read_events(last_event_id=events[0]['id'])
+        self.assertEqual([event['event'] for event in events], ['order_status_changed', 'order_deleted'])
+
+    def test_database_log(self):
+        self.check_stream()
+        self.assertEqual(OrderEvent.objects.count(), 3)
+
+    @override_settings(ORDER_EVENTS_BACKEND='memory')
+    def test_memory_log(self):
+        self.check_stream()
+        self.assertEqual(OrderEvent.objects.count(), 0)
+
+    def test_new_client_gets_only_new_events(self):
+        self.make_changes()
+        self.assertEqual(self.read_events(), [])
+
+    def test_fresh_events_wait_for_commit_lag(self):
+        last_id = get_event_log().last_id()
+        self.make_changes()
+        first_id = OrderEvent.objects.order_by('id').first().id
+        # событие с меньшим id ещё может быть не закоммичено: отдаётся только проверенное начало журнала
+        OrderEvent.objects.exclude(id=first_id).update(created_at='2000-01-01T00:00:00Z')
+        with self.settings(ORDER_EVENTS_COMMIT_LAG=60):
+            self.assertEqual(get_event_log().read(last_id), [])
+            self.assertEqual(get_event_log().last_id(), first_id - 1)
+            OrderEvent.objects.filter(id=first_id).update(created_at='2000-01-01T00:00:00Z')
+            self.assertEqual(len(get_event_log().read(last_id)), 3)
+
+    def test_no_events_for_rolled_back_changes(self):
+        last_id = get_event_log().last_id()
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.create(table_number=1)
+        self.client.post(
+            reverse('orders:order-api-list'),
+            data={'table_number': 1, 'items': [{'id': 0, 'count': 1}]}, content_type='application/json'
+        )
+        self.assertEqual(len(get_event_log().read(last_id)), 1)
+
+    def test_prune(self):
+        self.make_changes()
+        OrderEvent.objects.update(created_at='2000-01-01T00:00:00Z')
+        call_command('prune_order_events', '--older-than', '1', stdout=StringIO())
+        self.assertEqual(OrderEvent.objects.count(), 0)
+
+
+# Задержка доставки события с настройками по умолчанию: запись журнала коммитится
+# отдельно, как в работе, и её время по часам БД настоящее
+class OrderEventsLatencyTestCase(TransactionTestCase):
+
+    async def test_default_latency(self):
+        log = get_event_log()
+        loop = asyncio.get_running_loop()
+        stream = astream_order_events(await log.alast_id())
+        await anext(stream)
+
+        async def publish_later():
+            # событие появляется между опросами журнала
+            await asyncio.sleep(0.1)
+            await sync_to_async(log.publish)([(OrderEvent.Kind.DELETED, 1, {'id': 1, 'table_number': 1})])
+            return loop.time()
+
+        task = asyncio.create_task(publish_later())
+        chunk = await anext(stream)
+        received_at = loop.time()
+        self.assertTrue(chunk.startswith('id: '), chunk)
+        self.assertLess(received_at - await task, 1)
+        await stream.aclose()
@@ -0,0 +1,70 @@
+import csv
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from orders.archive import archive_orders
+from orders.models import Order, OrderItemRelation, Item
+
+
+# Выгрузка позиций заказов в CSV
+class ExportOrdersTestCase(TestCase):
+
+    def setUp(self):
+        coffee = Item.objects.create(title='Кофе', price=150)
+        tea = Item.objects.create(title='Чай', price=100)
+        self.order1 = Order.objects.create(table_number=1, status='Оплачено')
+        self.order2 = Order.objects.create(table_number=2)
+        OrderItemRelation.objects.create(order=self.order1, item=coffee, count=2)
+        OrderItemRelation.objects.create(order=self.order1, item=tea, count=1)
+        OrderItemRelation.objects.create(order=self.order2, item=tea, count=3)
+        return super().setUp()
+
+    def get_rows(self, **params):
+        resp = self.client.get(reverse('orders:order-api-export'), data=params)
+        self.assertEqual(resp.status_code, 200, 'Неверный статус')
+        self.assertEqual(resp['Content-Type'], 'text/csv; charset=utf-8')
+        return list(csv.DictReader(StringIO(b''.join(resp.streaming_content).decode())))
+
+    def test_export(self):
+        rows = self.get_rows()
+        self.assertEqual(
+            [(int(row['order_id']), row['title'], row['count'], row['line_total'], row['order_total']) for row in rows],
+            [
+                (self.order1.id, 'Кофе', '2', '300.00', '400.00'),
+                (self.order1.id, 'Чай', '1', '100.00', '400.00'),
+                (self.order2.id, 'Чай', '3', '300.00', '300.00'),
+            ]
+        )
+
+    def test_filters(self):
+        self.assertEqual(len(self.get_rows(status='Оплачено')), 2)
+        self.assertEqual(len(self.get_rows(**{'from': '2000-01-01', 'to': '2000-02-01'})), 0)
+        # границы периода точные, без округления до часа
+        Order.objects.filter(id=self.order1.id).update(created_at='2025-01-01T10:30:00Z')
+        self.assertEqual(len(self.get_rows(**{'from': '2025-01-01T10:15:00Z', 'to': '2025-01-01T10:31:00Z'})), 2)
+        self.assertEqual(len(self.get_rows(**{'from': '2025-01-01T10:00:00Z', 'to': '2025-01-01T10:30:00Z'})), 0)
+        resp = self.client.get(reverse('orders:order-api-export'), data={'status': 'Съеден'})
+        self.assertEqual(resp.status_code, 400, 'Неверный статус')
+
+    def test_archived_orders(self):
+        archive_orders(timezone.now())
+        self.assertEqual([int(row['order_id']) for row in self.get_rows()], [self.order2.id])
+        rows = self.get_rows(archived='1')
+        self.assertEqual(
+            [(int(row['order_id']), row['title'], row['status'], row['order_total']) for row in rows],
+            [
+                (self.order1.id, 'Кофе', 'Оплачено', '400.00'),
+                (self.order1.id, 'Чай', 'Оплачено', '400.00'),
+                (self.order2.id, 'Чай', 'В ожидании', '300.00'),
+            ]
+        )
+        self.assertEqual(len(self.get_rows(archived='1', status='Оплачено')), 2)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('export_orders', '--status', 'В ожидании', stdout=out)
+        rows = list(csv.DictReader(StringIO(out.getvalue())))
+        self.assertEqual([row['order_id'] for row in rows], [str(self.order2.id)])
@@ -0,0 +1,55 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from orders.models import Order, OrderItemRelation, Item
+from orders.views import OrderListView
+
+
+# Пагинация и кэш строк HTML списка заказов
+@mock.patch.object(OrderListView, 'paginate_by', 2)
+class OrderListPagesTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.item = Item.objects.create(title='Кофе', price=150)
+        self.orders = []
+        for table_number in (1, 2, 1):
+            order = Order.objects.create(table_number=table_number)
+            OrderItemRelation.objects.create(order=order, item=self.item, count=1)
+            self.orders.append(order)
+        self.url = reverse('orders:order-list')
+        return super().setUp()
+
+    def test_pages(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.context['orders'], [self.orders[2], self.orders[1]])
+        self.assertContains(resp, 'href="?page=2"')
+        resp = self.client.get(self.url, data={'page': 2})
+        self.assertEqual(resp.context['orders'], [self.orders[0]])
+        self.assertEqual(self.client.get(self.url, data={'page': 3}).status_code, 404)
+
+    def test_pages_keep_search(self):
+        resp = self.client.get(self.url, data={'q': '1'})
+        self.assertEqual(resp.context['orders'], [self.orders[2], self.orders[0]])
+        self.assertNotContains(resp, 'page=2')
+        resp = self.client.get(reverse('orders:order-list'), data={'q': 'ожидании'})
+        self.assertContains(resp, 'href="?q=%D0%BE%D0%B6%D0%B8%D0%B4%D0%B0%D0%BD%D0%B8%D0%B8&page=2"')
+
+    def test_cached_rows_skip_items_query(self):
+        self.client.get(self.url)
+        # count для пагинатора и страница заказов, позиции берутся из кэша строк
+        with self.assertNumQueries(2):
+            resp = self.client.get(self.url)
+        self.assertContains(resp, 'Кофе | 150.00 Руб. | x1', count=2)
+
+    def test_changed_row_is_rendered_again(self):
+        self.client.get(self.url)
+        url = reverse('orders:order-api-ud', args=(self.orders[2].id, ))
+        self.client.put(url, data={'status': 'Готово'}, content_type='application/json')
+        # позиции загружаются только для изменённого заказа
+        with self.assertNumQueries(3):
+            resp = self.client.get(self.url)
+        self.assertContains(resp, 'text-bg-primary', count=1)
+        self.assertContains(resp, 'text-bg-warning', count=1)
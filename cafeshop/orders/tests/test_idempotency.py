@@ -0,0 +1,90 @@
+from io import StringIO
+import threading
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from orders.models import Order, OrderItemRelation, IdempotencyKey, Item
+
+
+# Повторы POST /api/v1/orders с заголовком Idempotency-Key
+class IdempotencyKeyTestCase(TestCase):
+
+    def setUp(self):
+        self.item = Item.objects.create(title='Кофе', price=150)
+        self.url = reverse('orders:order-api-list')
+        self.body = {'table_number': 1, 'items': [{'id': self.item.id, 'count': 2}]}
+        return super().setUp()
+
+    def post(self, body, key='tablet-1-42', url=None):
+        return self.client.post(
+            url or self.url, data=body, content_type='application/json', headers={'idempotency_key': key}
+        )
+
+    def test_retry_returns_stored_response(self):
+        first = self.post(self.body)
+        self.assertEqual(first.status_code, 201, 'Неверный статус')
+        with self.assertNumQueries(4):
+            retry = self.post(self.body)
+        self.assertEqual(retry.status_code, 201, 'Неверный статус')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(OrderItemRelation.objects.count(), 1)
+
+    def test_async_retry(self):
+        url = reverse('orders:order-async-api-list')
+        self.assertEqual(self.post(self.body, url=url).json(), self.post(self.body, url=url).json())
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_reused_with_other_body(self):
+        self.post(self.body)
+        resp = self.post({**self.body, 'table_number': 2})
+        self.assertEqual(resp.status_code, 422, 'Неверный статус')
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_failed_request_is_not_stored(self):
+        bad_body = {'table_number': 1, 'items': [{'id': 0, 'count': 1}]}
+        self.assertEqual(self.post(bad_body).status_code, 400, 'Неверный статус')
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_expired_keys(self):
+        self.post(self.body)
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(self.post(self.body).status_code, 201, 'Неверный статус')
+        self.assertEqual(Order.objects.count(), 2)
+
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        call_command('prune_idempotency_keys', stdout=StringIO())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+# Параллельные дубли: каждый поток работает через своё соединение с БД
+class ConcurrentIdempotencyKeyTestCase(TransactionTestCase):
+
+    def test_concurrent_duplicates(self):
+        item = Item.objects.create(title='Кофе', price=150)
+        body = {'table_number': 1, 'items': [{'id': item.id, 'count': 2}]}
+        responses = []
+
+        def post():
+            try:
+                resp = Client().post(
+                    reverse('orders:order-api-list'), data=body, content_type='application/json',
+                    headers={'idempotency_key': 'same-key'}
+                )
+                responses.append((resp.status_code, resp.json()))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=post) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(len(responses), 5)
+        self.assertTrue(all(response == responses[0] for response in responses))
+        self.assertEqual(responses[0][0], 201)
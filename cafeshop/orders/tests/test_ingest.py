@@ -0,0 +1,83 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from orders.archive import archive_orders
+from orders.ingest import process_order_queue_batch
+from orders.models import Order, OrderTicket, ArchivedOrder, Item
+
+
+# Создание заказов через очередь заявок
+@override_settings(ORDER_INGEST_MODE='queue')
+class OrderQueueTestCase(TestCase):
+
+    def setUp(self):
+        self.coffee = Item.objects.create(title='Кофе', price=150)
+        self.tea = Item.objects.create(title='Чай', price=100)
+        self.url = reverse('orders:order-api-list')
+        return super().setUp()
+
+    def post(self, body):
+        return self.client.post(self.url, data=body, content_type='application/json')
+
+    def get_ticket(self, ticket_id):
+        return self.client.get(reverse('orders:order-api-ticket', args=(ticket_id, ))).json()
+
+    def test_enqueue_and_process(self):
+        resp = self.post({'table_number': 3, 'items': [{'id': self.coffee.id, 'count': 2}]})
+        self.assertEqual(resp.status_code, 202, 'Неверный статус')
+        ticket_id = resp.json()['ticket']
+        self.assertEqual(self.get_ticket(ticket_id)['status'], 'pending')
+        self.assertFalse(Order.objects.exists())
+
+        self.assertEqual(process_order_queue_batch(), 1)
+        ticket = self.get_ticket(ticket_id)
+        self.assertEqual(ticket['status'], 'done')
+        order = Order.objects.get(id=ticket['order_id'])
+        self.assertEqual((order.table_number, order.total_price), (3, 300))
+        self.assertEqual(process_order_queue_batch(), 0)
+
+    def test_archive_order_from_ticket(self):
+        ticket_id = self.post({'table_number': 3, 'items': [{'id': self.coffee.id, 'count': 2}]}).json()['ticket']
+        process_order_queue_batch()
+        order_id = self.get_ticket(ticket_id)['order_id']
+        Order.objects.filter(id=order_id).update(status='Оплачено')
+        self.assertEqual(archive_orders(timezone.now()), 1)
+        self.assertTrue(ArchivedOrder.objects.filter(id=order_id).exists())
+        ticket = self.get_ticket(ticket_id)
+        self.assertEqual((ticket['status'], ticket['order_id']), ('done', None))
+
+    def test_invalid_order_is_rejected_before_queue(self):
+        resp = self.post({'table_number': 3, 'items': [{'id': 0, 'count': 2}]})
+        self.assertEqual(resp.status_code, 400, 'Неверный статус')
+        self.assertFalse(OrderTicket.objects.exists())
+
+    def test_batch_worker(self):
+        ticket_ids = [
+            self.post({'table_number': i, 'items': [{'id': self.tea.id, 'count': i}]}).json()['ticket']
+            for i in range(1, 6)
+        ]
+        gone = self.post({'table_number': 9, 'items': [{'id': self.coffee.id, 'count': 1}]}).json()['ticket']
+        self.coffee.delete()
+        # число запросов не зависит от количества заявок: выборка, версия и каталог, два bulk_create,
+        # витрина, bulk_update и проверка пустой очереди
+        with self.assertNumQueries(15):
+            call_command('process_order_queue', '--once', stdout=StringIO())
+        self.assertEqual(Order.objects.count(), 5)
+        self.assertEqual([self.get_ticket(pk)['status'] for pk in ticket_ids], ['done'] * 5)
+        self.assertEqual(self.get_ticket(gone)['status'], 'failed')
+
+    def test_form_enqueues(self):
+        data = {
+            'table_number': 2, 'form-TOTAL_FORMS': 1, 'form-INITIAL_FORMS': 0,
+            'form-0-item': self.tea.id, 'form-0-count': 1,
+        }
+        self.client.post(reverse('orders:order-create'), data=data)
+        self.assertEqual(OrderTicket.objects.count(), 1)
+        self.assertFalse(Order.objects.exists())
+
+    def test_unknown_ticket(self):
+        resp = self.client.get(reverse('orders:order-api-ticket', args=(0, )))
+        self.assertEqual(resp.status_code, 404, 'Неверный статус')
@@ -0,0 +1,44 @@
+from django.test import TestCase
+from django.urls import reverse
+from cafeshop.metrics import registry
+from orders.models import Order, OrderItemRelation, Item
+
+
+# Метрики времени ответа и SQL по маршрутам
+class MetricsTestCase(TestCase):
+
+    def setUp(self):
+        registry.reset()
+        item = Item.objects.create(title='Кофе', price=150)
+        order = Order.objects.create(table_number=1)
+        OrderItemRelation.objects.create(order=order, item=item, count=1)
+        return super().setUp()
+
+    def test_route_metrics(self):
+        for _ in range(2):
+            self.client.get(reverse('orders:order-api-list'))
+        self.client.get(reverse('orders:order-list'))
+
+        route = registry.routes['orders:order-api-list', 'GET']
+        self.assertEqual(route.count, 2)
+        self.assertEqual(sum(route.buckets), 2)
+        # состояние для ETag и заказы с позициями одним запросом
+        self.assertEqual(route.queries, 4)
+        self.assertGreater(route.sql_seconds, 0)
+        self.assertIn(('orders:order-list', 'GET'), registry.routes)
+
+    async def test_async_route_metrics(self):
+        await self.async_client.get(reverse('orders:order-async-api-list'))
+        route = registry.routes['orders:order-async-api-list', 'GET']
+        self.assertEqual(route.count, 1)
+        self.assertEqual(route.queries, 2)
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('orders:order-api-list'))
+        resp = self.client.get(reverse('metrics'))
+        self.assertEqual(resp.status_code, 200, 'Неверный статус')
+        content = resp.content.decode()
+        labels = 'view="orders:order-api-list",method="GET"'
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1', content)
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 1', content)
+        self.assertIn(f'db_queries_total{{{labels}}} 2', content)
@@ -33,7 +33,7 @@ class GetOrdersTestCase(TestCase):
         ).prefetch_related(
             'orders__item'
         ).annotate(
-            total_price=Sum(F('orders__item__price') * F('orders__count'))
+            expected_total=Sum(F('orders__item__price') * F('orders__count'))
         ).order_by(
             '-created_at'
         )
@@ -50,7 +50,7 @@ class GetOrdersTestCase(TestCase):
                     'count': rel.count
                 } for rel in order.orders.all()
             ],
-            'total_price': '{:.2f}'.format(order.total_price)
+            'total_price': '{:.2f}'.format(order.expected_total)
         } for order in orders
     ]
         self.assertEqual(first=data_json, second=resp_json, msg=f'Не совпадает')
@@ -197,7 +197,7 @@ class GetOrdersTestCase(TestCase):
             ).prefetch_related(
                 'orders__item'
             ).annotate(
-                total_price=Sum(F('orders__item__price') * F('orders__count'))
+                expected_total=Sum(F('orders__item__price') * F('orders__count'))
             ).order_by(
                 '-created_at'
             ).filter(status='Готово')
@@ -215,10 +215,10 @@ class GetOrdersTestCase(TestCase):
                             'count': rel.count
                         } for rel in order.orders.all()
                     ],
-                    'total_price': '{:.2f}'.format(order.total_price)
+                    'total_price': '{:.2f}'.format(order.expected_total)
                 }  for order in qs
             ],
-            'total': '{:.2f}'.format(qs.aggregate(total=Sum('total_price')).get('total'))
+            'total': '{:.2f}'.format(qs.aggregate(total=Sum('expected_total')).get('total'))
         }
         self.assertEqual(resp.status_code, 200, 'Неверный статус')
         self.assertEqual(resp.json(), data, resp.json())
\ No newline at end of file
@@ -0,0 +1,53 @@
+from django.test import TestCase
+from django.urls import reverse
+from orders.models import Order, OrderItemRelation, Item
+
+
+# Курсорная пагинация GET /api/v1/orders
+class OrdersPaginationTestCase(TestCase):
+
+    def setUp(self):
+        self.item = Item.objects.create(title='Кофе', price=150)
+        self.orders = []
+        for table_number in (1, 2, 1, 3, 1):
+            order = Order.objects.create(table_number=table_number)
+            OrderItemRelation.objects.create(order=order, item=self.item, count=1)
+            self.orders.append(order)
+        self.url = reverse('orders:order-api-list')
+        return super().setUp()
+
+    def collect_pages(self, params):
+        ids = []
+        cursor = None
+        while True:
+            data = {**params}
+            if cursor:
+                data['cursor'] = cursor
+            resp = self.client.get(self.url, data=data)
+            self.assertEqual(resp.status_code, 200, resp.json())
+            ids.extend(order['id'] for order in resp.json()['results'])
+            cursor = resp.json()['next']
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_all_orders(self):
+        ids = self.collect_pages({'limit': 2})
+        self.assertEqual(ids, [order.id for order in reversed(self.orders)])
+
+    def test_pages_with_search(self):
+        ids = self.collect_pages({'limit': 1, 'q': '1'})
+        expected = [order.id for order in reversed(self.orders) if order.table_number == 1]
+        self.assertEqual(ids, expected)
+
+    def test_last_page_has_no_next(self):
+        resp = self.client.get(self.url, data={'limit': 10})
+        self.assertEqual(len(resp.json()['results']), len(self.orders))
+        self.assertIsNone(resp.json()['next'])
+
+    def test_invalid_cursor(self):
+        resp = self.client.get(self.url, data={'cursor': 'не курсор'})
+        self.assertEqual(resp.status_code, 400, 'Неверный статус')
+
+    def test_invalid_limit(self):
+        resp = self.client.get(self.url, data={'limit': 0})
+        self.assertEqual(resp.status_code, 400, 'Неверный статус')
@@ -0,0 +1,23 @@
+from django.db import connection
+from django.test import TestCase
+from orders.models import Order
+from orders.query_plans import get_plan, find_seq_scans, audit_query_plans
+
+
+# Аудит планов запросов
+class QueryPlansTestCase(TestCase):
+
+    def setUp(self):
+        Order.objects.bulk_create([Order(table_number=i % 10) for i in range(20)])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE orders_order')
+        return super().setUp()
+
+    def test_find_seq_scans(self):
+        plan = get_plan(Order.objects.filter(total_price=5))
+        self.assertEqual(find_seq_scans(plan, 10), [('orders_order', 20)])
+        self.assertEqual(find_seq_scans(plan, 20), [])
+
+    def test_audit_small_tables(self):
+        # на маленьких таблицах последовательное сканирование допустимо
+        self.assertEqual(audit_query_plans(threshold=1000), {})
@@ -0,0 +1,111 @@
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.db.models import Count, Sum
+from django.test import TestCase
+from django.urls import reverse
+from orders.models import Order, OrderItemRelation, Item, RevenueRollup
+from orders.rollup import get_revenue_total
+
+
+# Витрина выручки по часам и дням
+class RevenueRollupTestCase(TestCase):
+
+    def setUp(self):
+        self.item1 = Item.objects.create(title='Кофе', price=150)
+        self.item2 = Item.objects.create(title='Торт', price=250)
+        return super().setUp()
+
+    def create_order(self, created_at, status='Готово', count=1):
+        with mock.patch('django.utils.timezone.now', return_value=created_at):
+            order = Order.objects.create(table_number=1, status=status)
+            OrderItemRelation.objects.create(order=order, item=self.item1, count=count)
+        return order
+
+    def assertRollupConsistent(self):
+        expected = {
+            row['status']: (row['orders_count'], row['total'])
+            for row in Order.objects.values('status').annotate(
+                orders_count=Count('id'), total=Sum('total_price')
+            ).order_by()
+        }
+        for granularity in RevenueRollup.Granularity.values:
+            actual = {
+                row['status']: (row['orders_count'], row['total'])
+                for row in RevenueRollup.objects.filter(granularity=granularity).values('status').annotate(
+                    orders_count=Sum('orders_count'), total=Sum('total')
+                ).order_by() if row['orders_count']
+            }
+            self.assertEqual(actual, expected, granularity)
+
+    def test_rollup_follows_writes(self):
+        url = reverse('orders:order-api-list')
+        body = {'table_number': 3, 'items': [{'id': self.item1.id, 'count': 2}, {'id': self.item2.id, 'count': 1}]}
+        order_id = self.client.post(url, data=body, content_type='application/json').json()['id']
+        batch = [{'table_number': 4, 'items': [{'id': self.item2.id, 'count': 3}]}] * 3
+        self.client.post(reverse('orders:order-api-batch'), data=batch, content_type='application/json')
+        self.assertRollupConsistent()
+
+        url = reverse('orders:order-api-ud', args=(order_id, ))
+        self.client.put(url, data={'status': 'Готово'}, content_type='application/json')
+        self.assertRollupConsistent()
+
+        order = Order.objects.exclude(id=order_id).first()
+        self.client.post(reverse('orders:order-edit', args=(order.id, )), data={'status': 'Оплачено'})
+        OrderItemRelation.objects.create(order=order, item=self.item1, count=5)
+        self.assertRollupConsistent()
+
+        self.client.delete(url)
+        self.client.post(reverse('orders:order-delete', args=(order.id, )))
+        self.assertRollupConsistent()
+
+    def test_rollup_follows_queryset_deletes(self):
+        order = self.create_order(datetime(2025, 1, 1, 10, 30, tzinfo=timezone.utc), count=2)
+        self.create_order(datetime(2025, 1, 1, 11, 30, tzinfo=timezone.utc))
+        mixed = self.create_order(datetime(2025, 1, 1, 12, 30, tzinfo=timezone.utc))
+        OrderItemRelation.objects.create(order=mixed, item=self.item2, count=1)
+
+        # действие админки "удалить выбранные" и удаление товара вместе с позициями
+        Order.objects.filter(id=order.id).delete()
+        self.assertRollupConsistent()
+        self.item1.delete()
+        self.assertRollupConsistent()
+        mixed.refresh_from_db()
+        self.assertEqual(mixed.total_price, 250)
+        self.assertEqual(get_revenue_total('Готово'), 250)
+
+    def test_revenue_date_range(self):
+        self.create_order(datetime(2025, 1, 1, 10, 30, tzinfo=timezone.utc))
+        self.create_order(datetime(2025, 1, 2, 15, 0, tzinfo=timezone.utc), count=2)
+        self.create_order(datetime(2025, 1, 3, 1, 0, tzinfo=timezone.utc), count=4)
+        self.create_order(datetime(2025, 1, 3, 1, 0, tzinfo=timezone.utc), status='Оплачено')
+
+        url = reverse('orders:order-api-revenue')
+        resp = self.client.get(url, data={'from': '2025-01-01T11:00:00', 'to': '2025-01-03'})
+        self.assertEqual(resp.status_code, 200, 'Неверный статус')
+        self.assertEqual(resp.json()['total'], '300.00')
+        self.assertEqual(len(resp.json()['orders']), 1)
+
+        resp = self.client.get(url, data={'from': '2025-01-01T10:00:00'})
+        self.assertEqual(resp.json()['total'], '1050.00')
+        self.assertEqual(len(resp.json()['orders']), 3)
+
+        self.assertEqual(
+            get_revenue_total(
+                'Готово',
+                datetime(2025, 1, 2, 14, tzinfo=timezone.utc),
+                datetime(2025, 1, 2, 16, tzinfo=timezone.utc)
+            ), 300
+        )
+        self.assertIsNone(get_revenue_total('Готово', datetime(2025, 2, 1, tzinfo=timezone.utc)))
+
+    def test_revenue_invalid_date(self):
+        resp = self.client.get(reverse('orders:order-api-revenue'), data={'from': 'вчера'})
+        self.assertEqual(resp.status_code, 400, 'Неверный статус')
+
+    def test_paid_page_total(self):
+        self.create_order(datetime(2025, 1, 1, 10, 30, tzinfo=timezone.utc), status='Оплачено')
+        self.create_order(datetime(2025, 1, 5, 10, 30, tzinfo=timezone.utc), status='Оплачено', count=2)
+        resp = self.client.get(reverse('orders:order-paid'), data={'from': '2025-01-02'})
+        self.assertEqual(resp.context['total'], 300)
+        self.assertEqual(len(resp.context['orders']), 1)
@@ -0,0 +1,46 @@
+from django.test import TestCase
+from django.urls import reverse
+from orders.funcs import search_orders
+from orders.models import Order, OrderItemRelation, Item
+
+
+# Поиск заказов: маршрутизация запроса q и сохранённый поисковый вектор
+class SearchOrdersTestCase(TestCase):
+
+    def setUp(self):
+        self.item = Item.objects.create(title='Кофе', price=150)
+        self.order1 = Order.objects.create(table_number=12)
+        self.order2 = Order.objects.create(table_number=2, status='Готово')
+        for order in (self.order1, self.order2):
+            OrderItemRelation.objects.create(order=order, item=self.item, count=1)
+        return super().setUp()
+
+    def search(self, query):
+        return search_orders(Order.objects.order_by('id'), query)
+
+    def test_numeric_query_uses_table_number(self):
+        qs = self.search(' 12 ')
+        self.assertNotIn('plainto_tsquery', str(qs.query))
+        self.assertEqual(list(qs), [self.order1])
+
+    def test_status_query_uses_status(self):
+        for query in ('готово', 'Ready'):
+            qs = self.search(query)
+            self.assertNotIn('plainto_tsquery', str(qs.query))
+            self.assertEqual(list(qs), [self.order2])
+
+    def test_full_text_query(self):
+        qs = self.search('Готово 2')
+        self.assertIn('plainto_tsquery', str(qs.query))
+        self.assertEqual(list(qs), [self.order2])
+        self.assertEqual(list(self.search('Готово 12')), [])
+
+    def test_search_vector_follows_status_change(self):
+        url = reverse('orders:order-api-ud', args=(self.order1.id, ))
+        self.client.put(url, data={'status': 'Оплачено'}, content_type='application/json')
+        resp = self.client.get(reverse('orders:order-api-list'), data={'q': 'Оплачено 12'})
+        self.assertEqual([order['id'] for order in resp.json()], [self.order1.id])
+
+    def test_html_list_search(self):
+        resp = self.client.get(reverse('orders:order-list'), data={'q': '2'})
+        self.assertEqual(list(resp.context['orders']), [self.order2])
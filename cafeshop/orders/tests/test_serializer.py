@@ -0,0 +1,56 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from orders.funcs import get_api_queryset, serialize_orders
+from orders.models import Order, OrderItemRelation, Item
+
+
+# Сериализация заказов из плоского запроса и выбор полей
+class SerializeOrdersTestCase(TestCase):
+
+    def setUp(self):
+        coffee = Item.objects.create(title='Кофе', price=150)
+        tea = Item.objects.create(title='Чай', price=100)
+        self.order1 = Order.objects.create(table_number=1)
+        OrderItemRelation.objects.create(order=self.order1, item=coffee, count=2)
+        OrderItemRelation.objects.create(order=self.order1, item=tea, count=1)
+        self.order2 = Order.objects.create(table_number=2, status='Готово')
+        self.url = reverse('orders:order-api-list')
+        return super().setUp()
+
+    def test_serialize_orders(self):
+        with self.assertNumQueries(1):
+            data = serialize_orders(get_api_queryset())
+        self.assertEqual(data, [
+            {'id': self.order2.id, 'status': 'Готово', 'table_number': 2, 'items': [], 'total_price': 0},
+            {
+                'id': self.order1.id, 'status': 'В ожидании', 'table_number': 1,
+                'items': [
+                    {'id': rel.item_id, 'title': rel.title, 'price': rel.price, 'count': rel.count}
+                    for rel in self.order1.orders.order_by('id')
+                ],
+                'total_price': 400
+            },
+        ])
+        self.assertEqual(list(data[1]), ['id', 'status', 'table_number', 'items', 'total_price'])
+
+    def test_fields(self):
+        resp = self.client.get(self.url, data={'fields': 'id,total_price'})
+        self.assertEqual(resp.json(), [
+            {'id': self.order2.id, 'total_price': '0.00'},
+            {'id': self.order1.id, 'total_price': '400.00'},
+        ])
+        resp = self.client.get(self.url, data={'fields': 'id', 'include': 'items', 'limit': 1})
+        self.assertEqual(resp.json()['results'], [{'id': self.order2.id, 'items': []}])
+
+    def test_fields_skip_items_join(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = serialize_orders(get_api_queryset(), ('id', 'status'), include_items=False)
+        self.assertEqual(len(data), 2)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('JOIN', queries[0]['sql'])
+
+    def test_unknown_field(self):
+        resp = self.client.get(self.url, data={'fields': 'id,secret'})
+        self.assertEqual(resp.status_code, 400, 'Неверный статус')
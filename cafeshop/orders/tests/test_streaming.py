@@ -0,0 +1,73 @@
+import json
+
+from asgiref.sync import async_to_sync
+from django.test import TestCase
+from django.urls import reverse
+from orders.models import Order, OrderItemRelation, Item
+from orders.rollup import apply_revenue_deltas
+
+
+# Потоковая отдача списка заказов и выручки
+class OrdersStreamingTestCase(TestCase):
+
+    def setUp(self):
+        self.item1 = Item.objects.create(title='Кофе', price=150)
+        self.item2 = Item.objects.create(title='Торт', price=250)
+        self.order1 = Order.objects.create(table_number=1)
+        self.order2 = Order.objects.create(table_number=2, status='Готово')
+        self.order3 = Order.objects.create(table_number=3, status='Готово')
+        OrderItemRelation.objects.create(order=self.order1, item=self.item1, count=1)
+        OrderItemRelation.objects.create(order=self.order2, item=self.item2, count=2)
+        OrderItemRelation.objects.create(order=self.order3, item=self.item1, count=3)
+        return super().setUp()
+
+    def read_stream(self, resp):
+        self.assertTrue(resp.streaming, 'Ответ не потоковый')
+        return b''.join(resp.streaming_content).decode()
+
+    def test_chunked_json_order_list(self):
+        url = reverse('orders:order-api-list')
+        expected = self.client.get(url).json()
+        resp = self.client.get(url, data={'stream': 1})
+        self.assertEqual(resp.status_code, 200, 'Неверный статус')
+        self.assertEqual(json.loads(self.read_stream(resp)), expected)
+
+    def test_ndjson_order_list(self):
+        url = reverse('orders:order-api-list')
+        expected = self.client.get(url, data={'q': 'Готово'}).json()
+        resp = self.client.get(url, data={'q': 'Готово'}, HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(resp['Content-Type'], 'application/x-ndjson')
+        lines = self.read_stream(resp).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_chunked_json_revenue(self):
+        url = reverse('orders:order-api-revenue')
+        expected = self.client.get(url).json()
+        resp = self.client.get(url, data={'stream': 1})
+        self.assertEqual(json.loads(self.read_stream(resp)), expected)
+
+    def test_ndjson_revenue(self):
+        url = reverse('orders:order-api-revenue')
+        expected = self.client.get(url).json()
+        resp = self.client.get(url, HTTP_ACCEPT='application/x-ndjson')
+        lines = [json.loads(line) for line in self.read_stream(resp).splitlines()]
+        self.assertEqual(lines[:-1], expected['orders'])
+        self.assertEqual(lines[-1], {'total': expected['total']})
+
+    def test_archived_revenue(self):
+        # архивная выручка есть только в витрине, в потоке заказов её нет
+        apply_revenue_deltas([(self.order2.created_at, 'Готово', 1, 1000)], archived=True)
+        url = reverse('orders:order-api-revenue')
+        expected = self.client.get(url, data={'archived': 1}).json()
+        self.assertEqual(expected['total'], '1950.00')
+        resp = self.client.get(url, data={'archived': 1, 'stream': 1})
+        self.assertEqual(json.loads(self.read_stream(resp)), expected)
+
+        url = reverse('orders:order-async-api-revenue')
+        resp = async_to_sync(self.async_client.get)(url, data={'archived': 1}, headers={'Accept': 'application/x-ndjson'})
+        content = async_to_sync(self.aread_stream)(resp)
+        self.assertEqual(json.loads(content.splitlines()[-1]), {'total': '1950.00'})
+
+    async def aread_stream(self, resp):
+        self.assertTrue(resp.streaming, 'Ответ не потоковый')
+        return b''.join([chunk async for chunk in resp.streaming_content]).decode()
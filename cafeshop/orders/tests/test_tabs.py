@@ -0,0 +1,74 @@
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from orders.models import Order, OrderItemRelation, RevenueRollup, Item
+from orders.query_plans import get_plan, iter_plan_nodes
+
+
+# Открытые счета столов и закрытие счёта
+class OpenTabsTestCase(TestCase):
+
+    def setUp(self):
+        self.coffee = Item.objects.create(title='Кофе', price=150)
+        self.cake = Item.objects.create(title='Торт', price=300)
+        self.order1 = self.create_order(1, [(self.coffee, 2)])
+        self.order2 = self.create_order(1, [(self.coffee, 1), (self.cake, 1)], status='Готово')
+        self.paid = self.create_order(1, [(self.cake, 3)], status='Оплачено')
+        self.order3 = self.create_order(2, [(self.cake, 1)])
+        return super().setUp()
+
+    def create_order(self, table_number, lines, status='В ожидании'):
+        order = Order.objects.create(table_number=table_number, status=status)
+        for item, count in lines:
+            OrderItemRelation.objects.create(order=order, item=item, count=count)
+        return order
+
+    def test_all_tables_one_query(self):
+        with self.assertNumQueries(1):
+            data = self.client.get(reverse('orders:table-api-tabs')).json()
+        self.assertEqual([tab['table_number'] for tab in data], [1, 2])
+        tab = data[0]
+        self.assertEqual([order['id'] for order in tab['orders']], [self.order1.id, self.order2.id])
+        self.assertEqual(tab['items'], [
+            {'id': self.coffee.id, 'title': 'Кофе', 'price': '150.00', 'count': 3, 'total': '450.00'},
+            {'id': self.cake.id, 'title': 'Торт', 'price': '300.00', 'count': 1, 'total': '300.00'},
+        ])
+        self.assertEqual(tab['total'], '750.00')
+
+    def test_one_table(self):
+        data = self.client.get(reverse('orders:table-api-tab', args=(2, ))).json()
+        self.assertEqual((data['table_number'], data['total']), (2, '300.00'))
+        self.assertEqual(data['orders'][0]['version'], 1)
+        data = self.client.get(reverse('orders:table-api-tab', args=(5, ))).json()
+        self.assertEqual(data, {'table_number': 5, 'orders': [], 'items': [], 'total': '0.00'})
+
+    def test_settle_table(self):
+        resp = self.client.post(reverse('orders:table-api-settle', args=(1, )), data={}, content_type='application/json')
+        self.assertEqual(resp.status_code, 200, 'Неверный статус')
+        self.assertEqual(resp.json(), {'succeeded': [self.order1.id, self.order2.id], 'failed': [], 'total': '750.00'})
+        self.assertEqual(Order.objects.exclude(status='Оплачено').get(), self.order3)
+        paid = RevenueRollup.objects.get(granularity='day', status='Оплачено')
+        self.assertEqual((paid.orders_count, paid.total), (3, 1650))
+        data = self.client.get(reverse('orders:table-api-tab', args=(1, ))).json()
+        self.assertEqual(data['orders'], [])
+
+    def test_settle_only_orders_from_bill(self):
+        # заказ другого стола и уже оплаченный заказ не закрываются
+        body = {'ids': [self.order1.id, self.order3.id, self.paid.id]}
+        resp = self.client.post(reverse('orders:table-api-settle', args=(1, )), data=body, content_type='application/json')
+        self.assertEqual(resp.json(), {
+            'succeeded': [self.order1.id], 'failed': [self.order3.id, self.paid.id], 'total': '300.00'
+        })
+        self.order2.refresh_from_db()
+        self.assertEqual(self.order2.status, 'Готово')
+        resp = self.client.post(
+            reverse('orders:table-api-settle', args=(1, )), data={'ids': []}, content_type='application/json'
+        )
+        self.assertEqual(resp.status_code, 400, 'Неверный статус')
+
+    def test_partial_index_plan(self):
+        # на маленькой таблице планировщик выбрал бы последовательное сканирование
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = get_plan(Order.objects.filter(table_number=1).exclude(status='Оплачено'))
+        self.assertIn('order_open_table_idx', [node.get('Index Name') for node in iter_plan_nodes(plan)])
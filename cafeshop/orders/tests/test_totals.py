@@ -0,0 +1,40 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from orders.models import Order, OrderItemRelation, Item
+
+
+# Хранимые суммы заказов и снимки цен позиций
+class OrderTotalsTestCase(TestCase):
+
+    def setUp(self):
+        self.item1 = Item.objects.create(title='Кофе', price=150)
+        self.item2 = Item.objects.create(title='Торт', price=250)
+        self.order = Order.objects.create(table_number=1)
+        self.rel1 = OrderItemRelation.objects.create(order=self.order, item=self.item1, count=1)
+        self.rel2 = OrderItemRelation.objects.create(order=self.order, item=self.item2, count=2)
+        return super().setUp()
+
+    def test_total_maintained_on_write(self):
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_price, 650)
+        self.rel2.delete()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_price, 150)
+
+    def test_price_snapshot(self):
+        self.item1.title = 'Капучино'
+        self.item1.price = 999
+        self.item1.save()
+        order = self.client.get(reverse('orders:order-api-list')).json()[0]
+        self.assertEqual(order['items'][0]['title'], 'Кофе')
+        self.assertEqual(order['items'][0]['price'], '150.00')
+        self.assertEqual(order['total_price'], '650.00')
+
+    def test_list_has_no_aggregate_or_item_join(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('orders:order-api-list'))
+        for query in ctx.captured_queries:
+            self.assertNotIn('SUM(', query['sql'])
+            self.assertNotIn('items_item', query['sql'])
@@ -0,0 +1,123 @@
+import threading
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+from orders.models import Order, OrderItemRelation, RevenueRollup, Item
+
+
+# Смена статуса по таблице переходов с проверкой версии заказа
+class StatusTransitionsTestCase(TestCase):
+
+    def setUp(self):
+        item = Item.objects.create(title='Кофе', price=150)
+        self.order = Order.objects.create(table_number=1)
+        OrderItemRelation.objects.create(order=self.order, item=item, count=2)
+        self.url = reverse('orders:order-api-ud', args=(self.order.id, ))
+        return super().setUp()
+
+    def put(self, body, url=None):
+        return self.client.put(url or self.url, data=body, content_type='application/json')
+
+    def test_transitions_map(self):
+        self.assertEqual(Order.StatusType.PAID.sources, ['В ожидании', 'Готово'])
+        self.assertEqual(Order.StatusType.PAID.targets, ())
+
+    def test_update_with_version(self):
+        # условный UPDATE и обновление витрины выручки
+        with self.assertNumQueries(4):
+            resp = self.put({'status': 'Готово', 'version': 1})
+        self.assertEqual(resp.status_code, 200, resp.json())
+        self.assertEqual(resp.json()['version'], 2)
+        resp = self.put({'status': 'Оплачено', 'version': 2})
+        self.assertEqual(resp.status_code, 200, resp.json())
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.status, self.order.version), ('Оплачено', 3))
+        paid = RevenueRollup.objects.get(granularity='day', status='Оплачено')
+        self.assertEqual((paid.orders_count, paid.total), (1, 300))
+
+    def test_stale_version_conflict(self):
+        self.put({'status': 'Готово', 'version': 1})
+        resp = self.put({'status': 'Оплачено', 'version': 1})
+        self.assertEqual(resp.status_code, 409, 'Неверный статус')
+        self.assertEqual((resp.json()['status'], resp.json()['version']), ('Готово', 2))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'Готово')
+        self.assertFalse(RevenueRollup.objects.filter(status='Оплачено').exists())
+
+    def test_paid_order_is_final(self):
+        self.put({'status': 'Оплачено'})
+        for status in ('В ожидании', 'Готово'):
+            resp = self.put({'status': status})
+            self.assertEqual(resp.status_code, 409, 'Неверный статус')
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'Оплачено')
+
+    def test_same_status(self):
+        # текущий статус: 200 с версией без изменения заказа, устаревшая версия - конфликт
+        resp = self.put({'status': 'В ожидании'})
+        self.assertEqual((resp.status_code, resp.json()['version']), (200, 1))
+        self.assertEqual(self.put({'status': 'В ожидании', 'version': 1}).status_code, 200, 'Неверный статус')
+        self.put({'status': 'Готово', 'version': 1})
+        self.assertEqual(self.put({'status': 'Готово', 'version': 2}).json()['version'], 2)
+        resp = self.put({'status': 'Готово', 'version': 1})
+        self.assertEqual((resp.status_code, resp.json()['version']), (409, 2))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.version, 2)
+
+    def test_missing_order_and_bad_version(self):
+        url = reverse('orders:order-api-ud', args=(0, ))
+        self.assertEqual(self.put({'status': 'Готово'}, url).status_code, 404, 'Неверный статус')
+        self.assertEqual(self.put({'status': 'Готово', 'version': '1'}).status_code, 400, 'Неверный статус')
+
+    def test_async_update(self):
+        url = reverse('orders:order-async-api-ud', args=(self.order.id, ))
+        self.assertEqual(async_to_sync(self.async_client.put)(
+            url, data={'status': 'Оплачено', 'version': 1}, content_type='application/json'
+        ).status_code, 200, 'Неверный статус')
+        self.assertEqual(async_to_sync(self.async_client.put)(
+            url, data={'status': 'Готово'}, content_type='application/json'
+        ).status_code, 409, 'Неверный статус')
+
+    def test_edit_form(self):
+        url = reverse('orders:order-edit', args=(self.order.id, ))
+        resp = self.client.get(url)
+        self.assertEqual([value for value, _ in resp.context['form'].fields['status'].choices],
+                         ['В ожидании', 'Готово', 'Оплачено'])
+        self.put({'status': 'Готово'})
+        # форма открыта до смены статуса официантом на другом планшете
+        resp = self.client.post(url, data={'status': 'Оплачено', 'version': 1})
+        self.assertEqual(resp.status_code, 409, 'Неверный статус')
+        self.assertContains(resp, 'Текущий статус: Готово', status_code=409)
+        resp = self.client.post(url, data={'status': 'Оплачено', 'version': 2})
+        self.assertRedirects(resp, reverse('orders:order-list'))
+        resp = self.client.get(url)
+        self.assertEqual([value for value, _ in resp.context['form'].fields['status'].choices], ['Оплачено'])
+
+
+# Параллельная смена статуса одной версии заказа: проходит только одна
+class ConcurrentStatusTransitionsTestCase(TransactionTestCase):
+
+    def test_concurrent_updates(self):
+        order = Order.objects.create(table_number=1)
+        url = reverse('orders:order-api-ud', args=(order.id, ))
+        barrier = threading.Barrier(4)
+        codes = []
+
+        def put(status):
+            try:
+                barrier.wait()
+                resp = Client().put(url, data={'status': status, 'version': 1}, content_type='application/json')
+                codes.append(resp.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=put, args=(status, )) for status in ('Готово', 'Оплачено') * 2]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(codes), [200, 409, 409, 409])
+        order.refresh_from_db()
+        self.assertEqual(order.version, 2)
@@ -2,13 +2,28 @@ from django.urls import path, include
 
 from . import views
 from . import api_views
+from . import async_api_views
 
 app_name = 'orders'
 
 api_urls = [
     path('api/v1/orders', api_views.orders_list_rest_api, name='order-api-list'),
+    path('api/v1/orders/batch', api_views.orders_batch_rest_api, name='order-api-batch'),
+    path('api/v1/orders/bulk', api_views.orders_bulk_rest_api, name='order-api-bulk'),
+    path('api/v1/orders/analytics', api_views.get_analytics_api, name='order-api-analytics'),
+    path('api/v1/orders/export', api_views.export_orders_api, name='order-api-export'),
+    path('api/v1/orders/events', async_api_views.order_events_api, name='order-api-events'),
     path('api/v1/orders/revenue', api_views.get_revenue, name='order-api-revenue'),
+    path('api/v1/orders/tickets/<int:pk>', api_views.order_ticket_api, name='order-api-ticket'),
     path('api/v1/orders/<int:pk>', api_views.order_update_delete_api, name='order-api-ud'),
+    path('api/v1/tables', api_views.open_tabs_api, name='table-api-tabs'),
+    path('api/v1/tables/<int:table_number>', api_views.open_tabs_api, name='table-api-tab'),
+    path('api/v1/tables/<int:table_number>/settle', api_views.settle_table_rest_api, name='table-api-settle'),
+
+    # асинхронные версии API для ASGI
+    path('api/v1/async/orders', async_api_views.orders_list_rest_api, name='order-async-api-list'),
+    path('api/v1/async/orders/revenue', async_api_views.get_revenue, name='order-async-api-revenue'),
+    path('api/v1/async/orders/<int:pk>', async_api_views.order_update_delete_api, name='order-async-api-ud'),
 ]
 
 urlpatterns = [
@@ -1,23 +1,49 @@
-from django.db.models import Sum, F
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models import prefetch_related_objects
 from django.urls import reverse_lazy
 from django.forms import formset_factory
+from django.http import Http404
 from django.http.request import HttpRequest
 from django.http.response import HttpResponse
 from django.shortcuts import render, redirect
-from django.contrib.postgres.search import SearchVector
+from django.utils.decorators import method_decorator
 from django.views.generic import DeleteView, ListView, UpdateView
 
-from orders.models import Order, OrderItemRelation
+from cafeshop.db_router import use_replica
+from orders.models import Order
 from .forms import OrderModelForm, OrderItemForm, OrderUpdateForm
+from .funcs import (
+    save_orders, get_revenue_date_range, filter_date_range, get_include_archived, search_orders,
+    change_order_status, get_status_conflict
+)
+from .ingest import enqueue_order
+from .rollup import get_revenue_total
 
 
 # вьюшка смены статуса заказа
 class OrderUpdateView(UpdateView):
     model = Order
-    form = OrderUpdateForm
-    fields = ['status']
+    form_class = OrderUpdateForm
     template_name = 'orders/order_edit.html'
 
+    # статус меняется условным UPDATE, а не сохранением прочитанного объекта
+    def form_valid(self, form):
+        status = form.cleaned_data['status']
+        if status == form.initial['status']:
+            return redirect(self.get_success_url())
+        version = form.cleaned_data['version']
+        if change_order_status(self.object.pk, status, version) is None:
+            data, code = get_status_conflict(self.object.pk, status, version)
+            if code == 200:
+                return redirect(self.get_success_url())
+            if code == 404:
+                raise Http404(data['error'])
+            form.add_error(None, f'{data["error"]} Текущий статус: {data["status"]}.')
+            return self.render_to_response(self.get_context_data(form=form), status=code)
+        return redirect(self.get_success_url())
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['title'] = f'Заказ №{self.object.id}'
@@ -36,51 +62,68 @@ class OrderDeleteView(DeleteView):
 
 
 # Представление для отображения списка заказов
+@method_decorator(use_replica, name='dispatch')
 class OrderListView(ListView):
     model = Order
     template_name = 'orders/orders.html'
     context_object_name = 'orders'
+    paginate_by = settings.ORDER_LIST_PAGE_SIZE
+    # имя фрагмента {% cache %} строки заказа в шаблоне
+    row_fragment = 'order_row'
     
     # устанавливаем свой queryset
     def get_queryset(self):
-        queryset = super().get_queryset().prefetch_related(
-            'orders'
-        ).prefetch_related(
-            'orders__item'
-        ).annotate(
-            total_price=Sum(F('orders__item__price') * F('orders__count'))
-        ).order_by(
-            '-created_at'
+        queryset = super().get_queryset().order_by(
+            '-created_at', '-id'
         )
 
         # поиск по полям table_number и status
-        if self.request.GET:
-            search_query = self.request.GET.get('q')
-            if search_query:
-                queryset = queryset.annotate(
-                                search=SearchVector("table_number", "status"),
-                            ).filter(search=search_query)
-        return queryset
+        return search_orders(queryset, self.request.GET.get('q'))
+
+    # позиции загружаются только для заказов, строк которых нет в кэше
+    def prefetch_uncached_rows(self, orders: list[Order]):
+        keys = {
+            order.id: make_template_fragment_key(self.row_fragment, [order.id, order.updated_at])
+            for order in orders
+        }
+        cached = cache.get_many(keys.values())
+        prefetch_related_objects([order for order in orders if keys[order.id] not in cached], 'orders')
     
     # добавляем в context название страницы
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['title'] = 'Заказы'
+        orders = context['orders'] = context['object_list'] = list(context['object_list'])
+        self.prefetch_uncached_rows(orders)
+        context['row_cache_timeout'] = settings.ORDER_ROW_CACHE_TIMEOUT
+        # параметры фильтров для ссылок на другие страницы
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        context['query'] = params.urlencode()
         return context
 
 
 #Вьюшка для отображения страницы выручки
 class OrderPaidView(OrderListView):
     template_name = 'orders/orders_paid.html'
+    row_fragment = 'order_paid_row'
+
+    def get_date_range(self):
+        try:
+            return get_revenue_date_range(self.request.GET)
+        except Exception:
+            return None, None
 
     def get_queryset(self): # Получение queryset
         queryset = super().get_queryset().filter(status='Оплачено')
-        return queryset
+        return filter_date_range(queryset, *self.get_date_range())
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['title'] = 'Выручка'
-        context['total'] = self.get_queryset().aggregate(total=Sum('total_price')).get('total')
+        context['total'] = get_revenue_total(
+            'Оплачено', *self.get_date_range(), get_include_archived(self.request.GET)
+        )
         return context
 
 
@@ -100,12 +143,17 @@ def create_order(request: HttpRequest) -> HttpResponse:
                 if len(order_items) == 1 and len(order_items[0]) == 0:
                     error = 'Нельзя создать пустой заказ'
                 else:
-                    order = Order.objects.create(table_number=table_number)
-                    for elem in order_items:
-                        item = elem.get('item')
-                        count = elem.get('count')
-                        if item and count:
-                            OrderItemRelation.objects.create(order=order, item=item, count=count)
+                    items_obj = [
+                        [elem.get('item'), elem.get('count')]
+                        for elem in order_items if elem.get('item') and elem.get('count')
+                    ]
+                    if settings.ORDER_INGEST_MODE == 'queue':
+                        enqueue_order({
+                            'table_number': table_number,
+                            'items': [{'id': item.id, 'count': count} for item, count in items_obj]
+                        })
+                    else:
+                        save_orders([(table_number, items_obj)])
                     return redirect('orders:order-list')
             else:
                 error = 'Неправильно заполнена форма состава заказа'